@@ -1,4 +1,5 @@
-import os, sys, subprocess, time, select, platform
+import os, sys, subprocess, time, select, platform, asyncio, signal, shutil
+from collections import deque
 from pathlib import Path
 
 try:
@@ -20,69 +21,222 @@ except ImportError:
 
 import IPython
 
-def runrotalumis(model_file, output_directory, library_paths=[]):
-    """model is a path to a model (relative to the rotalumis executable, or absolute)
-    The runner will execute the model and print the output to the IPython/Jupyter notebook.
-    Returns the exit code of the Rotalumis process
+def get_rotalumis_bin():
+    """
+    Returns the path of the Rotalumis executable next to this runner.
     """
     basedir = os.path.abspath(os.path.dirname(str(__file__)))
+    if platform.system() == "Linux":
+        rotalumis_bin = os.path.join(basedir, "rotalumis")
+    else:
+        rotalumis_bin = os.path.join(basedir, "rotalumis.exe")
+    if not os.path.isfile(rotalumis_bin):
+        raise Exception(f"Could not locate Rotalumis in {rotalumis_bin}")
+    return rotalumis_bin
+
+def get_arguments(model_file, library_paths=[], memory_limit=None):
+    """
+    Builds the Rotalumis command line, relative model paths are resolved against the current working directory.
+    With a memory_limit Rotalumis is started through prlimit, so its address space is limited before it runs.
+    """
+    inputmodel = os.path.abspath(model_file)
+
+    lib_includes = []
+    for l in library_paths:
+        lib_includes += ["-I", str(l)]
+
+    return get_limit_arguments(memory_limit) + [get_rotalumis_bin(), '--stdlib', '--poosl', inputmodel] + lib_includes
+
+def get_limit_arguments(memory_limit=None):
+    """
+    Prefix which limits the address space of the started command to memory_limit bytes.
+    prlimit sets the limit and then executes the command itself, unlike a preexec_fn this is safe in a process with threads.
+    """
+    if memory_limit is None:
+        return []
+    prlimit = shutil.which("prlimit")
+    if prlimit is None:
+        message = "A memory limit needs the prlimit utility, which is only available on Linux"
+        print(message)
+        raise Exception(message)
+    return [prlimit, f"--as={int(memory_limit)}", "--"]
+
+def get_kill_message(reason):
+    """
+    Line which is appended to stderr.txt when the runner stopped Rotalumis, so the run is recognized as failed.
+    """
+    return f"[ERROR  ] Rotalumis was stopped: {reason}\n"
+
+def kill_process(p):
+    """
+    Kills Rotalumis together with any process it started, they share the session created at launch.
+    """
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(p.pid, signal.SIGKILL)
+        else:
+            p.kill()
+    except ProcessLookupError:
+        pass  # Rotalumis already exited
+
+POLL_INTERVAL = 0.2  # Seconds between two checks of the wall clock limit of a running simulation
+STDERR_TAIL_LINES = 50  # Number of trailing stderr lines kept in memory for the error message
+MAX_LINE_LENGTH = 4096  # Longer lines are cut in the tail
+
+class StderrWatcher:
+    """Reads the stderr.txt file which Rotalumis writes to directly.
+    Only the last tail_lines lines are kept in memory.
+    """
+
+    def __init__(self, stderr_file, tail_lines=STDERR_TAIL_LINES):
+        self.file = open(stderr_file, "r", encoding='utf-8', errors='replace', newline='')
+        self.tail = deque(maxlen=tail_lines)
+        self.partial = ""  # Last line while Rotalumis has not finished writing it
+
+    def poll(self):
+        """Reads everything written since the last poll.
+        """
+        data = self.file.read()
+        while data:
+            lines = (self.partial + data).split("\n")
+            self.partial = lines.pop()[-MAX_LINE_LENGTH:]
+            for line in lines:
+                self.tail.append(line[-MAX_LINE_LENGTH:] + "\n")
+            data = self.file.read()
+
+    def add(self, text):
+        self.tail.append(text)
+
+    def get_tail(self):
+        return "".join(self.tail) + self.partial
+
+    def close(self):
+        self.file.close()
+
+def finish_stderr(stderr_file, kill_reasons):
+    """Reads the error output once Rotalumis has exited, appends the kill message when the runner stopped Rotalumis.
+    Returns the tail of the error output
+    """
+    watcher = StderrWatcher(stderr_file)
+    watcher.poll()
+    watcher.close()
+    if kill_reasons:
+        message = get_kill_message(kill_reasons[0])
+        with open(stderr_file, "a", newline='') as f:
+            if watcher.partial:
+                # Rotalumis was killed in the middle of a line
+                f.write("\n")
+                watcher.add(watcher.partial + "\n")
+                watcher.partial = ""
+            f.write(message)
+        watcher.add(message)
+    return watcher.get_tail()
+
+def runrotalumis(model_file, output_directory, library_paths=[], timeout=None, memory_limit=None):
+    """model is a path to a model (relative to the current working directory, or absolute)
+    The runner will execute the model with output_directory as its working directory,
+    the working directory of this process is left untouched.
+    Rotalumis is killed when it runs longer than timeout seconds, memory_limit limits its address space in bytes.
+    Returns the exit code of the Rotalumis process and the tail of its error output when it failed
+    """
     returncode = -1
     
-    prev_dir = os.getcwd()
-    
     if not os.path.isdir(output_directory):
         os.makedirs(output_directory)
     returnerror = ""
     
-    try:
-        if platform.system() == "Linux":
-            rotalumis_bin = os.path.join(basedir, "rotalumis")
-        else:
-            rotalumis_bin = os.path.join(basedir, "rotalumis.exe")
-        if not os.path.isfile(rotalumis_bin):
-            raise Exception(f"Could not locate Rotalumis in {rotalumis_bin}")
-            
-        if not os.path.isabs(model_file):
-            inputmodel = os.path.join(prev_dir, model_file)
-        else:
-            inputmodel = model_file
-
-        lib_includes = []
-        
-        for l in library_paths:
-            lib_includes += ["-I", l]
+    args = get_arguments(model_file, library_paths, memory_limit)
+    
+    is_interactive = IPython.get_ipython() is not None
+    is_interactive = False
+    
+    if is_interactive:
+        try:
+            # make sure the outputs are going into the output folder!
+            p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=output_directory)
+            while p.poll() is None:
+                stdout(p.stdout.read().decode('utf-8'))
+                stderr(p.stderr.read().decode('utf-8'))
+                time.sleep(0.1)
+        finally:
+            p.terminate()
+    else: 
+        # make sure the outputs are going into the output folder!
+        # the output is written by Rotalumis itself, only a tail of stderr is kept in memory
+        stderr_file = os.path.join(output_directory, "stderr.txt")
+        kill_reasons = []
+        with open(os.path.join(output_directory, "stdout.txt"), "wb") as out, open(stderr_file, "wb") as err:
+            p = subprocess.Popen(args, stdout=out, stderr=err, cwd=output_directory, start_new_session=True)
+        start = time.perf_counter()
 
-        os.chdir(output_directory) # make sure the outputs are going into this folder!                    
-        
-        is_interactive = IPython.get_ipython() is not None
-        is_interactive = False
-        args = [rotalumis_bin, '--stdlib', '--poosl', inputmodel] + lib_includes
-        
-        if is_interactive:
+        while p.poll() is None:
+            if timeout is not None and time.perf_counter() - start > timeout and not kill_reasons:
+                kill_reasons.append(f"the wall clock limit of {timeout} s was exceeded")
+                kill_process(p)
             try:
-                p = subprocess.Popen(args + lib_includes, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                while p.poll() is None:
-                    stdout(p.stdout.read().decode('utf-8'))
-                    stderr(p.stderr.read().decode('utf-8'))
-                    time.sleep(0.1)
-            finally:
-                p.terminate()
-        else: 
-            p = subprocess.run(args, capture_output=True, encoding='utf-8')
-            with open("stdout.txt", "w", newline='') as f:
-                f.write(p.stdout)
-            with open("stderr.txt", "w", newline='') as f:
-                f.write(p.stderr)
-
-            if p.returncode != 0 and Path("stderr.txt").exists():
-                with open("stderr.txt", "r") as f:
-                    returnerror = f.read()
-        returncode = p.returncode
-    finally:
-        # always put the current working directory back!
-        os.chdir(prev_dir)
+                p.wait(timeout=POLL_INTERVAL)
+            except subprocess.TimeoutExpired:
+                pass
+
+        tail = finish_stderr(stderr_file, kill_reasons)
+        if p.returncode != 0:
+            returnerror = tail
+    returncode = p.returncode
         
     return returncode, returnerror
+
+async def runrotalumis_async(model_file, output_directory, library_paths=[], timeout=None, memory_limit=None):
+    """Asynchronous variant of runrotalumis which is safe to use from threads and event loops.
+    Rotalumis runs with output_directory as its working directory, its output is
+    written straight into stdout.txt and stderr.txt, the tail of the latter is read when it exits.
+    timeout and memory_limit limit the run as in runrotalumis.
+    Returns the exit code of the Rotalumis process and the error output when it failed
+    """
+    if not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+    returnerror = ""
+    kill_reasons = []
+    
+    args = get_arguments(model_file, library_paths, memory_limit)
+    stderr_file = os.path.join(output_directory, "stderr.txt")
+    
+    with open(os.path.join(output_directory, "stdout.txt"), "wb") as out, open(stderr_file, "wb") as err:
+        p = await asyncio.create_subprocess_exec(*args, stdout=out, stderr=err, cwd=output_directory, start_new_session=True)
+    start = time.perf_counter()
+    
+    while p.returncode is None:
+        if timeout is not None and time.perf_counter() - start > timeout and not kill_reasons:
+            kill_reasons.append(f"the wall clock limit of {timeout} s was exceeded")
+            kill_process(p)
+        try:
+            await asyncio.wait_for(p.wait(), POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+    returncode = p.returncode
+    
+    tail = finish_stderr(stderr_file, kill_reasons)
+    if returncode != 0:
+        returnerror = tail
+    
+    return returncode, returnerror
+
+async def runrotalumis_batch(lJobs, maxConcurrent=None, **limits):
+    """Runs many models concurrently from a single event loop.
+    lJobs is a list of (model_file, output_directory, library_paths) tuples, at most
+    maxConcurrent (default: the number of cores) simulations run at the same time.
+    The limits (timeout, memory_limit) are applied to every simulation.
+    Yields (index of the job, (exit code, error), wall time in seconds) as the simulations complete
+    """
+    semaphore = asyncio.Semaphore(maxConcurrent if maxConcurrent else os.cpu_count())
+    
+    async def run(index, job):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await runrotalumis_async(*job, **limits)
+            return index, result, time.perf_counter() - start
+    
+    for future in asyncio.as_completed([run(index, job) for index, job in enumerate(lJobs)]):
+        yield await future
     
 if __name__ == "__main__":    
     runrotalumis(sys.argv[1], sys.argv[2], sys.argv[3:])
@@ -1,9 +1,12 @@
 import re
 import os
-from constants import D_MAPPINGS, OUTPUT_DIR_BASE, D_VOLTAGES, D_PROCESSORS,D_SCHEDULES
-from platform_config import PlatformConfig
-from dse import exhaustive_search, iterative_search, directed_iterative_search
-from simulations import analyze_results, single_sim, parallel_sims, contains_error
+from constants import D_MAPPINGS, OUTPUT_DIR_BASE, D_VOLTAGES, D_PROCESSORS,D_SCHEDULES, WINNER_POLICY, FIDELITY_RUNGS, NSGA_POPULATION_SIZE, NSGA_GENERATIONS
+from platform_config import PlatformConfig, get_unique_configs
+from result_sink import ResultSink
+from nsga2 import nsga2_search
+from bayesian import bayesian_search
+from dse import exhaustive_search as dse_exhaustive_search, iterative_search, directed_iterative_search
+from simulations import analyze_results, single_sim, parallel_sims, contains_error, get_executor
 
 # Requires : // if FiringLatency > LatencyBound then self error("Latency is diverging. Throughput constraint is not met.") fi;
 
@@ -28,7 +31,7 @@ def analyse_original():
     )
 
     # Run a single simulation
-    single_sim(original_config)
+    single_sim(original_config, analyze=True)
 
     # Analyze results after simulation completion
     energy, avgLatency, throughput = analyze_results(original_config)
@@ -49,7 +52,7 @@ def run_benchmark(*lNumOfNodes):
     ) for n in lNumOfNodes]
 
     # Run a single simulation
-    parallel_sims(lInitials)
+    parallel_sims(lInitials, analyze=True, executor=get_executor())
 
     # Analyze results after simulation completion
     for config in lInitials:
@@ -61,26 +64,40 @@ def run_benchmark(*lNumOfNodes):
 # Exhaustive search
 # =====================
 
-def exhaustive_search(*lNumOfNodes):
-    # Generate the configuration tree
+def exhaustive_search(*lNumOfNodes, shard=(0, 1)):
+    # Number of configurations per number of nodes
     dConfigs = {}
 
     for i in lNumOfNodes:
-        dConfigs[f"{i}Nodes"] = exhaustive_search(i, dryRun=False)
+        dConfigs[f"{i}Nodes"] = dse_exhaustive_search(i, dryRun=False, shard=shard)
 
 # =====================
 # Iterative search
 # =====================
 
-def perform_iterative_search(lNumOfNodes, dryRun=True, winnerSampleSize=1, iterations=1):
+def perform_iterative_search(lNumOfNodes, dryRun=True, winnerSampleSize=1, iterations=1, resume=False, winnerPolicy=WINNER_POLICY, fidelityRungs=FIDELITY_RUNGS):
     sWinners = set()
     for  numOfNodes in lNumOfNodes:
-        sWinners = sWinners.union(iterative_search(numOfNodes, winnerSampleSize, iterations, dryRun))
+        sWinners = sWinners.union(iterative_search(numOfNodes, winnerSampleSize, iterations, dryRun, resume, winnerPolicy, fidelityRungs))
+    return sWinners
 
-def perform_directed_iterative_search(dryRun=True, winnerSampleSize=1, iterations=1, maxDepth=1, *lNumOfNodes):
+def perform_directed_iterative_search(lNumOfNodes, dryRun=True, winnerSampleSize=1, iterations=1, maxDepth=1, resume=False, winnerPolicy=WINNER_POLICY, fidelityRungs=FIDELITY_RUNGS):
     sWinners = set()
     for  numOfNodes in lNumOfNodes:
-        sWinners = sWinners.union(directed_iterative_search(numOfNodes, winnerSampleSize, iterations, dryRun, maxDepth))
+        sWinners = sWinners.union(directed_iterative_search(numOfNodes, winnerSampleSize, iterations, dryRun, maxDepth, resume, winnerPolicy, fidelityRungs))
+    return sWinners
+
+def perform_bayesian_search(lNumOfNodes, dryRun=True, winnerSampleSize=1, iterations=1, seed=None):
+    sWinners = set()
+    for numOfNodes in lNumOfNodes:
+        sWinners = sWinners.union(bayesian_search(numOfNodes, winnerSampleSize, iterations, dryRun, seed=seed))
+    return sWinners
+
+def perform_nsga2_search(lNumOfNodes, dryRun=True, populationSize=NSGA_POPULATION_SIZE, generations=NSGA_GENERATIONS, seed=None):
+    lFront = []
+    for numOfNodes in lNumOfNodes:
+        lFront += nsga2_search(numOfNodes, populationSize, generations, dryRun=dryRun, seed=seed)
+    return lFront
 
 # =====================
 # Testing of Task Graph Modifications
@@ -152,7 +169,7 @@ dMergedConfigs = {
 }
 
 for key in dMergedConfigs.keys():
-    dMergedConfigs[key].applicationType = key
+    dMergedConfigs[key].set_application_type(key)
 
 # =====================
 # Alter Mappings
@@ -337,15 +354,18 @@ def altered_mappings(sWinners):
             lConfigs.append(create_config(winner.config.configName, ddMappings["Ad_MI_Ad_MI_MI"]))
             lConfigs.append(create_config(winner.config.configName, ddMappings["Ad_MI_Ad_MI_Ad"]))
 
-    parallel_sims(lConfigs)
+    # Altered mappings of different winners can describe the same system with other node numbers
+    lConfigs = get_unique_configs(lConfigs)
+    parallel_sims(lConfigs, analyze=True)
 
     if os.path.isfile(OUTPUT_DIR_BASE.joinpath(f"altered_mapping.csv")):
         os.remove(OUTPUT_DIR_BASE.joinpath(f"altered_mapping.csv"))
         
-    for config in lConfigs:
-        if not contains_error(config):
-            analyze_results(config)
-            config.write_results_to_csv(OUTPUT_DIR_BASE.joinpath(f"altered_mapping.csv"))
+    with ResultSink(OUTPUT_DIR_BASE.joinpath(f"altered_mapping.csv")) as sink:
+        for config in lConfigs:
+            if not contains_error(config):
+                analyze_results(config)
+                sink.add(config)
         
     del lConfigs
     
@@ -412,18 +432,19 @@ def get_priority_configs(lWinners):
                         llPriorityConfigs.append(create_config(winner, ddMappings["Ad_Ad_Ad_MI"], [1] + start + mid + end + [11]))
                         llPriorityConfigs.append(create_config(winner, ddMappings["MI_Ad_Ad_Ad"], [1] + start + mid + end + [11]))
 
-    return
+    return get_unique_configs(llPriorityConfigs)
 
 def perform_priority_tests(lConfigs: list):
     if len(lConfigs) >= 100:
         lSims = [lConfigs.pop(0) for i in range(100)]
         
-        parallel_sims(lSims)
+        parallel_sims(lSims, analyze=True, executor=get_executor())
         
-        for config in lSims:
-            if not contains_error(config):
-                analyze_results(config)
-                config.write_results_to_csv(OUTPUT_DIR_BASE.joinpath(f"priority_based_search.csv"))
+        with ResultSink(OUTPUT_DIR_BASE.joinpath(f"priority_based_search.csv")) as sink:
+            for config in lSims:
+                if not contains_error(config):
+                    analyze_results(config)
+                    sink.add(config)
         
         del lSims
         
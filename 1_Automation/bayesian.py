@@ -0,0 +1,239 @@
+import math
+import random
+import numpy as np
+from surrogate import estimate_metrics
+from search import SearchStrategy, BatchEvaluator, run_search
+from dse import ConfigNode, L_NODE_OPTIONS, get_config_from_code, LL_DIGIT_CHANGES, get_root, get_geometric_mean, get_design_space_size, get_code_at
+from constants import L_PROCESSORS, L_SCHEDULES, BO_CANDIDATE_POOL_SIZE, FIDELITY_RUNGS
+
+# =====================
+# Features
+# =====================
+
+def get_features(code: tuple):
+    """
+    Encodes a configuration for the model: per node a one-hot processor and schedule and the voltage
+    scale, followed by the log of the analytic estimate of energy, latency and throughput.
+    """
+    lFeatures = []
+    for digit in code:
+        proc, sched, volt = L_NODE_OPTIONS[digit]
+        lFeatures += [float(proc == option) for option in L_PROCESSORS]
+        lFeatures += [float(sched == option) for option in L_SCHEDULES]
+        numerator, denominator = volt.split('/')
+        lFeatures.append(float(numerator) / float(denominator))
+    # The estimate carries most of the structure, the model only has to learn its error
+    lFeatures += [math.log(value) for value in estimate_metrics(get_config_from_code(code))]
+    return lFeatures
+
+# =====================
+# Gaussian Process
+# =====================
+
+class GaussianProcess:
+    """
+    Gaussian process regression with a squared exponential kernel on standardized inputs and outputs.
+    The length scale is the median distance between the observations.
+    """
+    def __init__(self, noise: float = 1e-4):
+        self.noise = noise  # Observation noise relative to the variance of the outputs
+
+    def fit(self, aX, aY):
+        aX = np.asarray(aX, dtype=float)
+        aY = np.asarray(aY, dtype=float)
+        self._xMean = aX.mean(axis=0)
+        self._xStd = aX.std(axis=0)
+        self._xStd[self._xStd == 0] = 1.0
+        self._yMean = aY.mean()
+        self._yStd = aY.std() if aY.std() > 0 else 1.0
+        self._aX = (aX - self._xMean) / self._xStd
+
+        aDistances = np.sqrt(self._get_squared_distances(self._aX, self._aX))
+        lengthScale = np.median(aDistances[aDistances > 0]) if np.any(aDistances > 0) else 1.0
+        self._lengthScale = lengthScale
+        aK = self._kernel(self._aX, self._aX) + self.noise * np.eye(len(aX))
+        self._aL = np.linalg.cholesky(aK)
+        self._aZ = np.linalg.solve(self._aL, (aY - self._yMean) / self._yStd)
+        self._aAlpha = np.linalg.solve(self._aL.T, self._aZ)
+        return self
+
+    def update(self, x, y: float):
+        """
+        Adds a single observation by extending the Cholesky factor with one row instead of refitting,
+        the standardization and the length scale of the last fit are kept.
+        """
+        aX = (np.asarray(x, dtype=float) - self._xMean) / self._xStd
+        aL12 = np.linalg.solve(self._aL, self._kernel(aX[None, :], self._aX)[0])
+        l22 = math.sqrt(max(1.0 + self.noise - aL12 @ aL12, 1e-12))
+        numOfObservations = len(self._aX)
+        aL = np.zeros((numOfObservations + 1, numOfObservations + 1))
+        aL[:numOfObservations, :numOfObservations] = self._aL
+        aL[numOfObservations, :numOfObservations] = aL12
+        aL[numOfObservations, numOfObservations] = l22
+        self._aL = aL
+        self._aX = np.vstack([self._aX, aX])
+        self._aZ = np.append(self._aZ, ((y - self._yMean) / self._yStd - aL12 @ self._aZ) / l22)
+        self._aAlpha = np.linalg.solve(self._aL.T, self._aZ)
+        return self
+
+    def predict(self, aX):
+        """
+        Returns:
+            tuple: (mean, standard deviation) of every row of aX.
+        """
+        aX = (np.asarray(aX, dtype=float) - self._xMean) / self._xStd
+        aKs = self._kernel(aX, self._aX)
+        aMean = aKs @ self._aAlpha
+        aV = np.linalg.solve(self._aL, aKs.T)
+        aVariance = np.clip(1.0 - np.sum(aV ** 2, axis=0), 1e-12, None)
+        return aMean * self._yStd + self._yMean, np.sqrt(aVariance) * self._yStd
+
+    def _get_squared_distances(self, aA, aB):
+        return np.clip(np.sum(aA ** 2, axis=1)[:, None] + np.sum(aB ** 2, axis=1)[None, :] - 2 * aA @ aB.T, 0, None)
+
+    def _kernel(self, aA, aB):
+        return np.exp(-0.5 * self._get_squared_distances(aA, aB) / self._lengthScale ** 2)
+
+_normal_cdf = np.vectorize(lambda z: 0.5 * (1 + math.erf(z / math.sqrt(2))))
+
+def get_expected_improvement(aMean, aStd, best: float, xi: float = 0.01):
+    """
+    Expected improvement over the best observation when maximizing.
+    """
+    aZ = (aMean - best - xi) / aStd
+    return (aMean - best - xi) * _normal_cdf(aZ) + aStd * np.exp(-0.5 * aZ ** 2) / math.sqrt(2 * math.pi)
+
+# =====================
+# Search
+# =====================
+
+def get_candidates(numOfNodes: int, lBest: list, sEvaluated: set, poolSize: int, rng: random.Random):
+    """
+    Random configurations of the whole design space plus every single attribute change of the best ones.
+    """
+    sCandidates = set()
+    for code in lBest:
+        for i, digit in enumerate(code):
+            for llChanges in LL_DIGIT_CHANGES:
+                for newDigit in llChanges[digit]:
+                    sCandidates.add(code[:i] + (newDigit,) + code[i+1:])
+
+    designSpaceSize = get_design_space_size(numOfNodes)
+    for i in range(min(poolSize, designSpaceSize)):
+        sCandidates.add(get_code_at(rng.randrange(designSpaceSize), numOfNodes))
+    return [code for code in sCandidates if code not in sEvaluated]
+
+class BayesianStrategy(SearchStrategy):
+    """
+    Asks for the root of the iterative searches and a random sample first, then every batch holds the
+    winnerSampleSize candidates with the highest expected improvement under a Gaussian process fit on
+    every result so far. Failed simulations count as the worst result.
+    """
+    def __init__(self, numOfNodes, winnerSampleSize, iterations: int = 10, poolSize: int = BO_CANDIDATE_POOL_SIZE, seed: int = None):
+        self.numOfNodes = numOfNodes
+        self.winnerSampleSize = winnerSampleSize
+        self.iterations = iterations
+        self.poolSize = poolSize
+        self.rng = random.Random(seed)
+        self.iteration = 0  # Iterations told so far
+        self.dFeatures = {}  # Code -> features, the estimate is only computed once per configuration
+        self.dScores = {}  # Code -> log geometric mean, None for a failed simulation
+        self.dNodes = {}  # Code -> analyzed ConfigNode
+        self._lAsked = []  # Nodes of the last batch
+        self._initialDone = False
+
+    def is_done(self):
+        return self._initialDone and self.iteration >= self.iterations
+
+    def get_features_of(self, code):
+        if code not in self.dFeatures:
+            self.dFeatures[code] = get_features(code)
+        return self.dFeatures[code]
+
+    def get_best(self):
+        return sorted(self.dNodes, key=lambda code: self.dScores[code], reverse=True)[:self.winnerSampleSize]
+
+    def ask(self, numOfConfigs: int = None):
+        if not self._initialDone:
+            # Start from the root of the iterative searches and a random sample
+            lCodes = [get_root(False, self.numOfNodes).code]
+            lCodes += get_candidates(self.numOfNodes, [], set(lCodes), 2 * self.winnerSampleSize, self.rng)
+        else:
+            lCodes = self.choose_batch()
+        self._lAsked = [ConfigNode(parent=None, code=code, dryRun=False) for code in lCodes]
+        return [node.config for node in self._lAsked]
+
+    def choose_batch(self):
+        lObserved = [code for code, score in self.dScores.items()]
+        lValid = [score for score in self.dScores.values() if score is not None]
+        if not lValid:
+            message = f"No configuration with {self.numOfNodes} nodes could be analyzed, the model cannot be fit"
+            print(message)
+            raise Exception(message)
+        worst = min(lValid)
+        lX = [self.get_features_of(code) for code in lObserved]
+        lY = [worst if score is None else score for score in self.dScores.values()]
+
+        lCandidates = get_candidates(self.numOfNodes, self.get_best(), set(self.dScores), self.poolSize, self.rng)
+        aCandidates = np.array([self.get_features_of(code) for code in lCandidates])
+
+        # Constant liar: every chosen candidate is added with its predicted value before the next choice,
+        # the model is fit once per batch and only updated for every chosen candidate
+        lBatch = []
+        best = max(lValid)
+        model = GaussianProcess().fit(lX, lY)
+        for i in range(min(self.winnerSampleSize, len(lCandidates))):
+            aMean, aStd = model.predict(aCandidates)
+            aImprovement = get_expected_improvement(aMean, aStd, best)
+            for chosen in lBatch:
+                aImprovement[chosen] = -np.inf
+            chosen = int(np.argmax(aImprovement))
+            lBatch.append(chosen)
+            model.update(aCandidates[chosen], float(aMean[chosen]))
+        return [lCandidates[i] for i in lBatch]
+
+    def tell(self, lResults: list):
+        for node, (config, metrics) in zip(self._lAsked, lResults):
+            # Nodes the evaluator could not analyze failed or were stopped early by successive halving
+            if metrics is not None and node.analyze():
+                self.dScores[node.code] = math.log(node.geoMean)
+                self.dNodes[node.code] = node
+            else:
+                self.dScores[node.code] = None
+        if not self._initialDone:
+            self._initialDone = True
+            return
+
+        message = f"{self.numOfNodes} Nodes, iteration {self.iteration} simulated {len(self._lAsked)} configs, {len(self.dScores)} in total"
+        print("\n" + message)
+        print("".join(["=" for i in range(len(message))]))
+        for code in self.get_best():
+            winner = self.dNodes[code]
+            print(f"\tWinner with geo-mean {get_geometric_mean(winner.throughput, 1/winner.avgLatency, 1/winner.energy)}:\t {winner.config.configName}:")
+        self.iteration += 1
+
+def bayesian_search(numOfNodes, winnerSampleSize, iterations: int = 10, dryRun: bool = True,
+                    poolSize: int = BO_CANDIDATE_POOL_SIZE, seed: int = None, fidelityRungs: int = FIDELITY_RUNGS):
+    """
+    Bayesian optimisation of the geometric mean, a drop-in alternative to directed_iterative_search.
+
+    Every iteration is evaluated as one BatchEvaluator batch. Within a batch the chosen candidates
+    are added to the model with their predicted value, so the batch spreads over the design space.
+    Dry runs take the analytic estimate as result instead of simulating.
+
+    Args:
+        numOfNodes (int): Number of nodes of every configuration.
+        winnerSampleSize (int): Number of configurations simulated per iteration.
+        iterations (int): Number of iterations, the budget is 1 + 2 * winnerSampleSize + iterations * winnerSampleSize simulations.
+        dryRun (bool): Estimate the metrics instead of simulating.
+        poolSize (int): Number of random candidates scored per iteration.
+        seed (int): Seed of the random generator, to repeat a search.
+        fidelityRungs (int): Number of simulation lengths of the successive halving, see BatchEvaluator.
+
+    Returns:
+        set: ConfigNode objects of the best winnerSampleSize configurations.
+    """
+    testName = f"bayesian_search_depth_{iterations}_sampsize_{winnerSampleSize}_{numOfNodes}_nodes.csv"
+    evaluator = BatchEvaluator(testName, dryRun=dryRun, fidelityRungs=fidelityRungs, estimate=True)
+    strategy = run_search(BayesianStrategy(numOfNodes, winnerSampleSize, iterations, poolSize, seed), evaluator)
+    return {strategy.dNodes[code] for code in strategy.get_best()}
@@ -0,0 +1,53 @@
+import os
+import pickle
+from pathlib import Path
+from dataclasses import dataclass, field
+from constants import CHECKPOINT_DIR
+
+# =====================
+# Search Checkpoints
+# =====================
+
+@dataclass
+class SearchState:
+    """
+    State of an iterative search after a completed iteration, enough to continue it in a new process.
+    Configurations are stored by their ConfigNode code, the metrics are restored from the result store.
+    """
+    iteration: int = 0  # Next iteration to run
+    lWinners: list = field(default_factory=list)  # (code, depth) of the current winners
+    sAllWinners: set = field(default_factory=set)  # Codes of every winner so far
+
+def get_checkpoint_file(testName: str):
+    """
+    Returns the checkpoint file of a search, named after its result table.
+    """
+    return CHECKPOINT_DIR.joinpath(Path(testName).with_suffix(".pkl").name)
+
+def save_search_state(file, state: SearchState):
+    """
+    Writes the state atomically, a crash while saving leaves the previous checkpoint intact.
+
+    Args:
+        file (Path): The checkpoint file.
+        state (SearchState): State after the last completed iteration.
+    """
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    tempFile = f"{file}.tmp"
+    with open(tempFile, "wb") as f:
+        pickle.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tempFile, file)
+
+def load_search_state(file):
+    """
+    Reads a checkpoint.
+
+    Returns:
+        SearchState: The stored state, None when there is no checkpoint.
+    """
+    if not os.path.isfile(file):
+        return None
+    with open(file, "rb") as f:
+        return pickle.load(f)
@@ -8,11 +8,36 @@ BASE_DIR = Path('SET_DIR/')
 MODEL_DIR = BASE_DIR.joinpath("0_POOSL_IDE")  # Path to the POOSL model directory
 MODEL_LIB_DIRS = [MODEL_DIR]  # List of directories containing model libraries
 OUTPUT_DIR_BASE = BASE_DIR.joinpath("1_Automation/output/")  # Base output directory
+RESULT_STORE_FILE = OUTPUT_DIR_BASE.joinpath("results.sqlite")  # Persistent store of simulation outcomes
+RESULT_STORE_VERSION = 1  # Schema version of the result store, raised when stored keys change meaning
+FLAT_OUTPUT_DIRS = False  # Store every config in a short hash named directory instead of the nested parameter tree
+OUTPUT_MANIFEST_FILE = OUTPUT_DIR_BASE.joinpath("manifest.jsonl")  # Maps the hash named directories to their parameters
+SCRATCH_DIR = None  # Fast directory, e.g. on a tmpfs, the simulations run in, None runs them in their output directory
+OUTPUT_RETENTION = "all"  # What an analyzed simulation leaves in its output directory: "all" files, its "logs" without the XML traces or "none"
+SIM_BACKEND = "pool"  # "pool" runs every simulation in a worker process, "async" launches them from one event loop
 
 # Load the POOSL model template for design space exploration (DSE)
 SIM_TIME = "0.1"  # Simulation runtime duration
+SIM_TIMEOUT = None  # Wall clock limit of a single simulation in seconds, None to wait until Rotalumis exits
+SIM_MEMORY_LIMIT = None  # Address space limit of a single simulation in bytes, None for no limit
+SIM_STOP_MODE = "time"  # "time" takes latency and throughput from the traces, "confidence" from the application monitors, which end the simulation once they are accurate
+SIM_ACCURACY = "0.95"  # Accuracy of the application monitors, an estimate is accurate once its relative error is below 1 - SIM_ACCURACY
+SIM_CONFIDENCE_LEVEL = "0.95"  # Confidence level of the intervals of the application monitors
+SIM_CONFIDENCE_TIME = "0.01"  # Longest traced time in confidence mode, the trace observers keep the model running until then
 MODEL_TEMPLATE = BASE_DIR.joinpath("1_Automation/templates/dse_template.poosl").read_text()
 OPTI_ITERATIONS = 10
+CHECKPOINT_DIR = OUTPUT_DIR_BASE.joinpath("checkpoints")  # Progress of the iterative searches, used to resume them
+EXHAUSTIVE_CHUNK_SIZE = 1024  # Configurations generated and simulated at once by the exhaustive search
+NSGA_POPULATION_SIZE = 24  # Individuals which survive every generation of the evolutionary search
+NSGA_GENERATIONS = 10  # Offspring generations of the evolutionary search
+BO_CANDIDATE_POOL_SIZE = 2048  # Random candidates scored by the Bayesian search every iteration
+FIDELITY_RUNGS = 1  # Simulation lengths of the successive halving evaluation, 1 simulates every candidate for SIM_TIME
+FIDELITY_REDUCTION = 3  # Every rung keeps one in this many candidates and simulates them this many times longer
+WINNER_POLICY = "geomean"  # "geomean" keeps the highest geometric means, "pareto" the non-dominated configurations
+DISTRIBUTED_AUTHKEY_ENV = "DSE_AUTHKEY"  # Environment variable with the shared secret of the coordinator and its workers, there is no default
+DISTRIBUTED_LEASE_TIME = 60.0  # Seconds a worker may go without renewing its lease before the job is handed to another worker
+DISTRIBUTED_MAX_ATTEMPTS = 3  # Leases of a single job before it is reported as failed
+DISTRIBUTED_SCRATCH_DIR = OUTPUT_DIR_BASE.joinpath("worker")  # Output directories of the simulations run by a worker
 
 # =====================
 # Config settings
@@ -0,0 +1,419 @@
+import io
+import os
+import time
+import socket
+import shutil
+import tarfile
+import tempfile
+import argparse
+import itertools
+import threading
+from pathlib import Path
+from collections import deque
+from dataclasses import dataclass
+from queue import Queue, Empty
+from multiprocessing import Process
+from multiprocessing.managers import BaseManager
+from platform_config import PlatformConfig
+from workspace import L_PROCESSOR_TABLES
+from simulations import SimulationResult, run_simulation
+from dse import get_config_at
+from constants import DISTRIBUTED_AUTHKEY_ENV, DISTRIBUTED_LEASE_TIME, DISTRIBUTED_MAX_ATTEMPTS, DISTRIBUTED_SCRATCH_DIR
+
+# =====================
+# Jobs
+# =====================
+
+@dataclass
+class SimulationJob:
+    """
+    A simulation handed to a worker. The model travels with the configuration, so workers never fill in the template.
+    """
+    jobId: int  # Number of the job at the coordinator
+    config: PlatformConfig  # Configuration to simulate, its output directory is the one at the coordinator
+    model: str  # Model text of the configuration
+    analyze: bool  # Reduce the traces on the worker, only the metrics and the logs are sent back
+
+def pack_output_dir(outputDir: Path, traces: bool = True):
+    """
+    Packs the files of an output directory into a compressed tar archive. The processor tables are
+    left out, they are only links to the shared copies and the coordinator does not need them.
+
+    Args:
+        outputDir (Path): Directory to pack.
+        traces (bool): Include the XML traces, the logs and the error output are always packed.
+
+    Returns:
+        bytes: The archive.
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        if os.path.isdir(outputDir):
+            for file in sorted(outputDir.iterdir()):
+                if file.is_file() and file.name not in L_PROCESSOR_TABLES and (traces or file.suffix != ".xml"):
+                    archive.add(file, arcname=file.name)
+    return buffer.getvalue()
+
+def unpack_output_dir(data: bytes, outputDir: Path):
+    os.makedirs(outputDir, exist_ok=True)
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as archive:
+        archive.extractall(outputDir, filter="data")
+
+def parse_address(text: str):
+    """
+    Parses a "host:port" address, an empty host is 127.0.0.1. Use 0.0.0.0 to listen on every interface.
+
+    Returns:
+        tuple: (host, port)
+    """
+    host, separator, port = text.rpartition(":")
+    if not separator or not port.isdigit():
+        message = f"Invalid address {text}, expected host:port"
+        print(message)
+        raise Exception(message)
+    return host or "127.0.0.1", int(port)
+
+def get_authkey(text: str = None):
+    """
+    Returns the shared secret of the coordinator and its workers, from the command line or from DISTRIBUTED_AUTHKEY_ENV.
+    The connections unpickle what they receive, so anyone with the secret can run code on the coordinator and
+    the workers. There is deliberately no default.
+
+    Args:
+        text (str): Secret given on the command line, None to read the environment variable.
+
+    Returns:
+        bytes: The secret, None when it is not set.
+    """
+    text = text if text is not None else os.environ.get(DISTRIBUTED_AUTHKEY_ENV)
+    return text.encode() if text else None
+
+def check_authkey(authkey: bytes):
+    if not authkey:
+        message = f"The coordinator and its workers need a shared secret, set {DISTRIBUTED_AUTHKEY_ENV} or pass --authkey"
+        print(message)
+        raise Exception(message)
+
+# =====================
+# Coordinator
+# =====================
+
+class JobBoard:
+    """
+    Hands the jobs of the coordinator out to workers under a lease.
+
+    A leased job belongs to a single worker until it is completed or the worker stops renewing the lease,
+    after which the job is handed out again. Only the result of the current lease holder is accepted,
+    so a worker which was given up on cannot report a job a second time.
+    """
+    def __init__(self, leaseTime: float = DISTRIBUTED_LEASE_TIME, maxAttempts: int = DISTRIBUTED_MAX_ATTEMPTS):
+        self.leaseTime = leaseTime
+        self.maxAttempts = maxAttempts
+        self._lock = threading.Lock()
+        self._dJobs = {}  # Job id -> SimulationJob which did not finish yet
+        self._pending = deque()  # Ids of the jobs waiting for a worker
+        self._dLeases = {}  # Job id -> (worker id, deadline)
+        self._dAttempts = {}  # Job id -> number of times the job was leased
+        self._results = Queue()  # (job id, SimulationResult, archive) of every finished job
+        self._closed = False
+
+    def submit(self, job: SimulationJob):
+        with self._lock:
+            self._dJobs[job.jobId] = job
+            self._dAttempts[job.jobId] = 0
+            self._pending.append(job.jobId)
+
+    def lease(self, workerId: str):
+        """
+        Returns:
+            SimulationJob: The next job for the worker, None when no job is waiting.
+        """
+        with self._lock:
+            self._expire()
+            if not self._pending:
+                return None
+            jobId = self._pending.popleft()
+            self._dAttempts[jobId] += 1
+            self._dLeases[jobId] = (workerId, time.monotonic() + self.leaseTime)
+            return self._dJobs[jobId]
+
+    def renew(self, jobId: int, workerId: str):
+        """
+        Returns:
+            bool: False when the worker lost the lease, its result will be ignored.
+        """
+        with self._lock:
+            lease = self._dLeases.get(jobId)
+            if lease is None or lease[0] != workerId:
+                return False
+            self._dLeases[jobId] = (workerId, time.monotonic() + self.leaseTime)
+            return True
+
+    def complete(self, jobId: int, workerId: str, result: SimulationResult, archive: bytes = None):
+        """
+        Returns:
+            bool: False when the worker lost the lease and the result was ignored.
+        """
+        with self._lock:
+            lease = self._dLeases.get(jobId)
+            if lease is None or lease[0] != workerId:
+                return False
+            del self._dLeases[jobId]
+            del self._dJobs[jobId]
+            self._results.put((jobId, result, archive))
+            return True
+
+    def get_result(self, timeout: float = None):
+        """
+        Waits for the next finished job, expired leases are handed out again meanwhile.
+
+        Returns:
+            tuple: (job id, SimulationResult, archive), None when no job finished within the timeout.
+        """
+        with self._lock:
+            self._expire()
+        try:
+            return self._results.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def get_lease_time(self):
+        return self.leaseTime
+
+    def is_closed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+    def _expire(self):
+        now = time.monotonic()
+        for jobId, (workerId, deadline) in list(self._dLeases.items()):
+            if deadline >= now:
+                continue
+            del self._dLeases[jobId]
+            job = self._dJobs[jobId]
+            if self._dAttempts[jobId] >= self.maxAttempts:
+                del self._dJobs[jobId]
+                message = f"Simulation of {job.config.configName} was lost by {self.maxAttempts} workers"
+                print(message)
+                self._results.put((jobId, SimulationResult(outputDir=job.config.outputDir, error=message,
+                                                           status="error", reason=message), None))
+            else:
+                print(f"Worker {workerId} lost {job.config.configName}, it is handed out again")
+                self._pending.appendleft(jobId)
+
+class _CoordinatorManager(BaseManager):
+    pass
+
+class _WorkerManager(BaseManager):
+    pass
+
+_WorkerManager.register("get_board")
+
+class DistributedExecutor:
+    """
+    Drop-in replacement of SimulationExecutor which hands the simulations to workers on other hosts.
+
+    Workers connect over TCP with "python distributed.py host:port" and lease one job at a time.
+    Install it with simulations.set_executor, or pass it as executor to parallel_sims.
+
+    Attributes:
+        address (tuple): (host, port) the coordinator listens on, the port is chosen by the system when it is 0.
+    """
+    def __init__(self, address: tuple, authkey: bytes, leaseTime: float = DISTRIBUTED_LEASE_TIME,
+                 maxAttempts: int = DISTRIBUTED_MAX_ATTEMPTS):
+        check_authkey(authkey)
+        self.board = JobBoard(leaseTime, maxAttempts)
+        _CoordinatorManager.register("get_board", callable=lambda: self.board)
+        self._server = _CoordinatorManager(address=address, authkey=authkey).get_server()
+        self.address = self._server.address
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._jobIds = itertools.count()
+        print(f"Coordinator waiting for workers on {self.address[0]}:{self.address[1]}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def imap_unordered(self, lSims: list, analyze: bool = False):
+        """
+        Submits the simulations and waits for the workers.
+
+        Yields:
+            tuple: (PlatformConfig, SimulationResult) as the simulations complete
+        """
+        dSims = {}  # Job id -> config of this process
+        for config in lSims:
+            jobId = next(self._jobIds)
+            dSims[jobId] = config
+            self.board.submit(SimulationJob(jobId, config, config.get_model(), analyze))
+
+        while dSims:
+            item = self.board.get_result(timeout=1.0)
+            if item is None:
+                continue
+            jobId, result, archive = item
+            config = dSims.pop(jobId)
+            if archive is not None:
+                unpack_output_dir(archive, config.outputDir)
+            yield config, result
+
+    def close(self):
+        if self._server is not None:
+            self.board.close()
+            # Idle workers poll once per second, give them the chance to see the board was closed
+            time.sleep(1.0)
+            self._server.stop_event.set()
+            self._server.listener.close()
+            self._server = None
+
+# =====================
+# Worker
+# =====================
+
+def run_job(job: SimulationJob, scratchDir: Path):
+    """
+    Simulates a job in the scratch directory of the worker.
+
+    Returns:
+        tuple: (SimulationResult, archive of the output directory)
+    """
+    config = job.config
+    coordinatorDir = config.outputDir
+    config.outputDir = scratchDir.joinpath(config.keyHash)
+    shutil.rmtree(config.outputDir, ignore_errors=True)
+    try:
+        result = run_simulation(config, analyze=job.analyze, model=job.model)
+    except Exception as e:
+        result = SimulationResult(outputDir=config.outputDir, error=str(e), status="error", reason=str(e))
+    # Analyzed jobs only send the logs back, the metrics replace the traces
+    archive = pack_output_dir(config.outputDir, traces=not job.analyze)
+    shutil.rmtree(config.outputDir, ignore_errors=True)
+    result.outputDir = coordinatorDir
+    return result, archive
+
+def renew_lease(board, jobId: int, workerId: str, interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        if not board.renew(jobId, workerId):
+            print(f"Worker {workerId} lost the lease of job {jobId}, its result will be ignored")
+            return
+
+def worker_loop(address: tuple, authkey: bytes, scratchDir: Path = DISTRIBUTED_SCRATCH_DIR,
+                pollInterval: float = 1.0, runJob=run_job):
+    """
+    Leases and simulates jobs of a coordinator until the coordinator closes or goes away.
+
+    Args:
+        address (tuple): (host, port) of the coordinator.
+        authkey (bytes): Shared secret of the coordinator.
+        scratchDir (Path): Directory for the output directories of the worker.
+        pollInterval (float): Seconds to wait before asking again when no job is waiting.
+        runJob (callable): Runs a job, see run_job.
+    """
+    check_authkey(authkey)
+    manager = _WorkerManager(address=address, authkey=authkey)
+    manager.connect()
+    board = manager.get_board()
+    workerId = f"{socket.gethostname()}-{os.getpid()}"
+    scratchDir = Path(scratchDir).joinpath(workerId)
+    leaseTime = board.get_lease_time()
+    try:
+        while not board.is_closed():
+            job = board.lease(workerId)
+            if job is None:
+                time.sleep(pollInterval)
+                continue
+            # Keep the lease alive while the simulation runs
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=renew_lease, args=(board, job.jobId, workerId, leaseTime / 3, stop), daemon=True)
+            heartbeat.start()
+            try:
+                result, archive = runJob(job, scratchDir)
+            finally:
+                stop.set()
+                heartbeat.join()
+            board.complete(job.jobId, workerId, result, archive)
+    except (EOFError, ConnectionError):
+        pass  # The coordinator has stopped
+    shutil.rmtree(scratchDir, ignore_errors=True)
+
+def run_workers(address: tuple, authkey: bytes, processes: int = None):
+    """
+    Runs one worker loop per process, every process simulates one job at a time.
+    """
+    lWorkers = [Process(target=worker_loop, args=(address, authkey)) for i in range(processes or os.cpu_count())]
+    for worker in lWorkers:
+        worker.start()
+    for worker in lWorkers:
+        worker.join()
+
+# =====================
+# Round Trip Check
+# =====================
+
+def _run_check_job(job: SimulationJob, scratchDir: Path):
+    """
+    Stand-in for run_job which does not need Rotalumis. The first worker to lease job 0 dies
+    without reporting, so that job is only finished after its lease expired.
+    """
+    marker = Path(scratchDir).parent.joinpath("lost")
+    if job.jobId == 0 and not marker.exists():
+        os.makedirs(marker.parent, exist_ok=True)
+        marker.touch()
+        os._exit(1)
+    time.sleep(0.1)
+    return SimulationResult(outputDir=job.config.outputDir, returncode=0, status="ok",
+                            energy=1.0, avgLatency=1.0, throughput=1.0), None
+
+def check_round_trip(numOfJobs: int = 6, processes: int = 2, leaseTime: float = 2.0):
+    """
+    Runs a coordinator and workers on localhost with stand-in simulations, to check the job, lease and expiry
+    path without Rotalumis or the output directories. One worker dies while it holds a job.
+
+    Returns:
+        bool: True when every job came back once and the lost job was handed out again.
+    """
+    authkey = os.urandom(32)
+    lConfigs = [get_config_at(index, 2) for index in range(numOfJobs)]
+    scratchDir = Path(tempfile.mkdtemp(prefix="dse-check-"))
+    start = time.monotonic()
+    with DistributedExecutor(("127.0.0.1", 0), authkey, leaseTime=leaseTime) as executor:
+        lWorkers = [Process(target=worker_loop, args=(executor.address, authkey, scratchDir, 0.1, _run_check_job))
+                    for i in range(processes)]
+        for worker in lWorkers:
+            worker.start()
+        lResults = list(executor.imap_unordered(lConfigs, analyze=True))
+        # The worker which died cannot report its job a second time
+        staleAccepted = executor.board.complete(0, "lost", lResults[0][1])
+    for worker in lWorkers:
+        worker.join(5)
+    shutil.rmtree(scratchDir, ignore_errors=True)
+
+    lMissing = [config.configName for config in lConfigs if all(config is not done for done, result in lResults)]
+    passed = (len(lResults) == numOfJobs and not lMissing and all(result.status == "ok" for config, result in lResults)
+              and not staleAccepted and time.monotonic() - start >= leaseTime)
+    print(f"Round trip of {numOfJobs} jobs over {processes} workers {'passed' if passed else 'failed'}")
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulation worker of a distributed design space exploration")
+    parser.add_argument("address", type=parse_address, nargs="?", default=None,
+                        help="host:port of the coordinator, see main.py --coordinator")
+    parser.add_argument("--processes", type=int, default=None, help="number of concurrent simulations, the number of cores by default")
+    parser.add_argument("--authkey", default=None,
+                        help=f"shared secret of the coordinator, {DISTRIBUTED_AUTHKEY_ENV} is read when it is not given")
+    parser.add_argument("--check", action="store_true",
+                        help="run a coordinator and workers on localhost with stand-in simulations instead")
+    args = parser.parse_args()
+    if args.check:
+        raise SystemExit(0 if check_round_trip() else 1)
+    if args.address is None:
+        parser.error("the address of the coordinator is required")
+    authkey = get_authkey(args.authkey)
+    if authkey is None:
+        parser.error(f"a shared secret is required, set {DISTRIBUTED_AUTHKEY_ENV} or pass --authkey")
+    run_workers(args.address, authkey, args.processes)
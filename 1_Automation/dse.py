@@ -1,79 +1,202 @@
-import os
+import argparse
 from copy import deepcopy
-from copy import copy
 from collections import deque
 from dataclasses import dataclass, field
 from platform_config import PlatformConfig
-from simulations import analyze_results, parallel_sims, contains_error, single_sim
+import numpy as np
+from pareto import ParetoFront, get_objectives, select_by_policy, get_crowding_distance
+from search import SearchStrategy, BatchEvaluator, run_search
+from checkpoint import SearchState, get_checkpoint_file, load_search_state, save_search_state
+from simulations import analyze_results, contains_error
 from constants import (
     L_PROCESSORS,
     L_SCHEDULES,
     L_VOLTAGE_SCALES,
     D_MAPPINGS,
-    OUTPUT_DIR_BASE,
+    EXHAUSTIVE_CHUNK_SIZE,
+    WINNER_POLICY,
+    FIDELITY_RUNGS,
 )
 
 
-@dataclass
+# =====================
+# Configuration Encoding
+# =====================
+
+def get_node_options():
+    """
+    Returns every (processor, schedule, voltage) combination a single node can take, the digits of the mixed radix index.
+    """
+    return [(proc, sched, volt) for proc in L_PROCESSORS for sched in L_SCHEDULES for volt in L_VOLTAGE_SCALES]
+
+L_NODE_OPTIONS = get_node_options()
+
+def get_digit_changes():
+    """
+    Lists for every attribute (processor, schedule, voltage) and every node option the options
+    which differ from it in only that attribute, so children can be generated without decoding.
+
+    Returns:
+        list: One list per attribute, indexed by the current option, of lists of new options.
+    """
+    llChanges = []
+    for attribute in range(3):
+        llChanges.append([
+            [newDigit for newDigit, newOption in enumerate(L_NODE_OPTIONS)
+             if newOption[attribute] != option[attribute]
+             and all(newOption[i] == option[i] for i in range(3) if i != attribute)]
+            for option in L_NODE_OPTIONS
+        ])
+    return llChanges
+
+LL_DIGIT_CHANGES = get_digit_changes()
+
+def get_design_space_size(numOfNodes):
+    return len(L_NODE_OPTIONS) ** numOfNodes
+
+def get_config_from_code(code: tuple, dryRun: bool = False):
+    """
+    Builds the configuration of an encoded ConfigNode.
+
+    Args:
+        code (tuple): Index in get_node_options() of every node, Node1 first.
+        dryRun (bool): Return a DryConfig instead of a PlatformConfig.
+
+    Returns:
+        PlatformConfig: The configuration, the mapping is taken from D_MAPPINGS.
+    """
+    lOptions = [L_NODE_OPTIONS[digit] for digit in code]
+
+    if dryRun:
+        return DryConfig(
+            dProcessors={f"Proc{i}": proc for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+            dSchedules={f"Poli{i}": sched for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+            dVoltageScales={f"Volt{i}": volt for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+        )
+    return PlatformConfig(
+        dMapping=D_MAPPINGS[f"{len(code)}Nodes"],
+        dPriority={f"PriorityTask{i}": str(i) for i in range(1, 12)},
+        dProcessors={f"Node{i}ProcessorType": proc for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+        dSchedules={f"OSPolicy{i}": sched for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+        dVoltageScales={f"VSF{i}": volt for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+    )
+
+def get_code_from_config(config: PlatformConfig):
+    """
+    Encodes the nodes of a configuration as a ConfigNode code, the inverse of get_config_from_code.
+    """
+    return tuple(
+        L_NODE_OPTIONS.index((config.dProcessors[f"Node{i}ProcessorType"], config.dSchedules[f"OSPolicy{i}"], config.dVoltageScales[f"VSF{i}"]))
+        for i in range(1, config.numOfNodes + 1)
+    )
+
+def get_config_from_row(dRow: dict):
+    """
+    Rebuilds the configuration of a row of a result table, see ResultSink.read_rows.
+
+    Returns:
+        PlatformConfig: The configuration, without metrics.
+    """
+    numOfNodes = int(dRow["nodes"])
+    return PlatformConfig(
+        dMapping={f"MapTask{i}To": dRow[f"mapTask{i}"] for i in range(1, 12)},
+        dPriority={f"PriorityTask{i}": dRow[f"priorityTask{i}"] for i in range(1, 12)},
+        dProcessors={f"Node{i}ProcessorType": dRow[f"processor{i}"] for i in range(1, numOfNodes + 1)},
+        dSchedules={f"OSPolicy{i}": dRow[f"schedule{i}"] for i in range(1, numOfNodes + 1)},
+        dVoltageScales={f"VSF{i}": dRow[f"voltage{i}"] for i in range(1, numOfNodes + 1)},
+        iteration=int(dRow["iteration"]),
+    )
+
+def get_code_at(index: int, numOfNodes: int):
+    """
+    Reads the index as a mixed radix number with one digit per node, Node1 being the most significant digit.
+    """
+    lDigits = []
+    for i in range(numOfNodes):
+        index, digit = divmod(index, len(L_NODE_OPTIONS))
+        lDigits.append(digit)
+    return tuple(reversed(lDigits))
+
+def get_config_at(index: int, numOfNodes: int, dryRun: bool = False):
+    """
+    Maps an index onto a configuration of the exhaustive design space without enumerating the ones before it.
+
+    The index is read as a mixed radix number with one digit per node, Node1 being the most
+    significant digit, every digit selects a (processor, schedule, voltage) combination.
+
+    Args:
+        index (int): Index in [0, get_design_space_size(numOfNodes)).
+        numOfNodes (int): Number of nodes, the mapping is taken from D_MAPPINGS.
+        dryRun (bool): Return a DryConfig instead of a PlatformConfig.
+
+    Returns:
+        PlatformConfig: The configuration at the index.
+    """
+    return get_config_from_code(get_code_at(index, numOfNodes), dryRun)
+
+
 class ConfigNode:
-    def __init__(self, parent, config: PlatformConfig):
+    """
+    Node of the configuration tree.
+
+    The configuration is encoded as a tuple with one small integer per node which indexes
+    get_node_options(), so hashing and comparing nodes is cheap. The PlatformConfig (or
+    DryConfig) is only built when the config attribute is accessed, e.g. to simulate it.
+    """
+    __slots__ = ("lChildren", "parent", "code", "dryRun", "depth", "avgLatency", "throughput",
+                 "energy", "geoMean", "analyzed", "_config", "_hash")
+
+    def __init__(self, parent, code: tuple, dryRun: bool = False):
         self.lChildren = []
         self.parent = parent
-        self.config = config
+        self.code = code  # Index of the (processor, schedule, voltage) option of every node
+        self.dryRun = dryRun
         self.depth = 0
         self.avgLatency = 0
         self.throughput = 0
         self.energy = 0
+        self.geoMean = 0
         self.analyzed = False
+        self._config = None  # Materialized configuration, None until it is accessed
+        self._hash = hash(code)
+
+    @property
+    def config(self):
+        if self._config is None:
+            self._config = get_config_from_code(self.code, self.dryRun)
+        return self._config
+
+    def get_index(self):
+        """
+        Returns the index of the configuration in the exhaustive design space, see get_config_at.
+        """
+        index = 0
+        for digit in self.code:
+            index = index * len(L_NODE_OPTIONS) + digit
+        return index
 
     def analyze(self):
         self.energy, self.avgLatency, self.throughput = analyze_results(self.config)
         if self.energy and self.avgLatency and self.throughput:
             self.analyzed = True
+            # Cache the ranking metric so get_winners does not recompute it every iteration
+            self.geoMean = get_geometric_mean(1/self.energy, 1/self.avgLatency, self.throughput)
             return self.energy, self.avgLatency, self.throughput
         else:
             return False
 
     def __hash__(self):
         """
-        Generates a unique hash for the configuration based on its attributes.
+        Returns the hash of the encoded configuration, it is computed once when the node is created.
         This ensures duplicate configurations are not added to the tree.
         """
-        if isinstance(self.config, DryConfig):
-            return hash(
-                (
-                    frozenset(self.config.dProcessors.items()),
-                    frozenset(self.config.dSchedules.items()),
-                    frozenset(self.config.dVoltageScales.items()),
-                )
-            )
-        elif isinstance(self.config, PlatformConfig):
-            return hash(
-                (
-                    frozenset(self.config.dMapping.items()),
-                    frozenset(self.config.dProcessors.items()),
-                    frozenset(self.config.dSchedules.items()),
-                    frozenset(self.config.dVoltageScales.items()),
-                )
-            )
+        return self._hash
 
     def __eq__(self, other):
         """
-        Checks equality between two ConfigNode objects based on their configurations.
+        Checks equality between two ConfigNode objects based on their encoded configurations.
         """
-        if isinstance(self.config, DryConfig):
-            return (
-                self.config.dProcessors == other.config.dProcessors
-                and self.config.dSchedules == other.config.dSchedules
-                and self.config.dVoltageScales == other.config.dVoltageScales
-            )
-        elif isinstance(self.config, PlatformConfig):
-            return (
-                self.config.dMapping == other.config.dMapping
-                and self.config.dProcessors == other.config.dProcessors
-                and self.config.dSchedules == other.config.dSchedules
-                and self.config.dVoltageScales == other.config.dVoltageScales
-            )
+        return self.code == other.code
 
 
 @dataclass
@@ -107,87 +230,25 @@ class DryConfig:
         )
 
 
-@dataclass
-class IterationConfig:
-    sInitialConfigNodes: set = field(default_factory=set)
-    configTree: ConfigNode = None
-    lConfigNodes: list = field(default_factory=list)
-    sWinnerNodes: dict = field(default_factory=dict)
-
+def get_child_single_change(parent: ConfigNode, node: int, newDigit: int):
+    """
+    Creates the child of a node in which the option of a single node is replaced.
 
-def get_child_single_change(
-    parent: ConfigNode, newValueKey: str, newValue, attrib: str
-):
-    newAttrib = copy(parent.config.__dict__[attrib])
-    newAttrib[newValueKey] = newValue
-
-    if isinstance(parent.config, DryConfig):
-        child = ConfigNode(
-            parent=parent,
-            config=DryConfig(
-                parent.config.dProcessors,
-                parent.config.dSchedules,
-                parent.config.dVoltageScales,
-            ),
-        )
-        child.depth = 0
-        child.config.__dict__[attrib] = newAttrib
-
-    elif isinstance(parent.config, PlatformConfig):
-        child = ConfigNode(
-            parent=parent,
-            config=PlatformConfig(
-                parent.config.dMapping,
-                parent.config.dPriority,
-                parent.config.dProcessors,
-                parent.config.dSchedules,
-                parent.config.dVoltageScales,
-            ),
-        )
-        child.config.__dict__[attrib] = newAttrib
-        child.depth = 0
-        child.config._get_name()
-    else:
-        Exception(f"Config type is unknown: {parent.config}")
+    Args:
+        parent (ConfigNode): The node to derive the child from.
+        node (int): Position of the node which changes, starting at 0.
+        newDigit (int): New index in get_node_options() of that node.
 
-    return child
+    Returns:
+        ConfigNode: The child.
+    """
+    code = parent.code[:node] + (newDigit,) + parent.code[node + 1:]
+    return ConfigNode(parent=parent, code=code, dryRun=parent.dryRun)
 
 
 def get_root(dryRun, numOfNodes):
-    # Start with the base configuration (default values)
-    if dryRun:
-        return ConfigNode(
-            parent=None,
-            config=DryConfig(
-                dProcessors={
-                    f"Proc{i}": L_PROCESSORS[0] for i in range(1, numOfNodes + 1)
-                },
-                dSchedules={
-                    f"Poli{i}": L_SCHEDULES[0] for i in range(1, numOfNodes + 1)
-                },
-                dVoltageScales={
-                    f"Volt{i}": L_VOLTAGE_SCALES[0] for i in range(1, numOfNodes + 1)
-                },
-            ),
-        )
-    else:
-        return ConfigNode(
-            parent=None,
-            config=PlatformConfig(
-                dMapping=D_MAPPINGS[f"{numOfNodes}Nodes"],
-                dPriority={f"PriorityTask{i}": str(i) for i in range(1, 12)},
-                dProcessors={
-                    f"Node{i}ProcessorType": L_PROCESSORS[0]
-                    for i in range(1, numOfNodes + 1)
-                },
-                dSchedules={
-                    f"OSPolicy{i}": L_SCHEDULES[0] for i in range(1, numOfNodes + 1)
-                },
-                dVoltageScales={
-                    f"VSF{i}": L_VOLTAGE_SCALES[0] for i in range(1, numOfNodes + 1)
-                },
-            ),
-        )
+    # Start with the base configuration (default values), option 0 is the first processor, schedule and voltage
+    return ConfigNode(parent=None, code=(0,) * numOfNodes, dryRun=dryRun)
 
 
 def generate_config_tree(
@@ -203,59 +264,121 @@ def generate_config_tree(
 
     queue = deque([(0, root)])  # Use a queue for BFS traversal
     visitedConfigs = {root}  # Store visited configurations to avoid duplicates
+    sVisitedCodes = {root.code}  # Codes of the visited and previous configurations, checked before a child is created
     if lPreviousConfigs is not None:
-        visitedConfigs = visitedConfigs.union(lPreviousConfigs)
+        sVisitedCodes.update(node.code for node in lPreviousConfigs)
 
     while queue:
         depth, current = queue.popleft()
+        if depth >= maxDepth:
+            continue
 
         # Generate child configurations by making one change at a time
-        for targetAttrib, lOptions in [
-            ("dProcessors", L_PROCESSORS),
-            ("dSchedules", L_SCHEDULES),
-            ("dVoltageScales", L_VOLTAGE_SCALES),
-        ]:
-            for node, currentAttrib in current.config.__dict__[targetAttrib].items():
-                for newValue in lOptions:
-                    if newValue != currentAttrib:  # Change only if different
-                        child = get_child_single_change(
-                            current, node, newValue, targetAttrib
-                        )
-                        if child not in visitedConfigs and depth < maxDepth:
-                            current.lChildren.append(child)
-                            queue.append((depth + 1, child))
-                            visitedConfigs.add(child)
-
-        # Remove added lPreviousConfigs
-        visitedConfigs = (
-            visitedConfigs
-            if lPreviousConfigs is None
-            else visitedConfigs.difference(lPreviousConfigs)
-        )
+        for lDigitChanges in LL_DIGIT_CHANGES:
+            for node, digit in enumerate(current.code):
+                for newDigit in lDigitChanges[digit]:
+                    code = current.code[:node] + (newDigit,) + current.code[node + 1:]
+                    if code not in sVisitedCodes:
+                        child = get_child_single_change(current, node, newDigit)
+                        current.lChildren.append(child)
+                        queue.append((depth + 1, child))
+                        visitedConfigs.add(child)
+                        sVisitedCodes.add(code)
+
+    # Remove added lPreviousConfigs
+    if lPreviousConfigs is not None:
+        visitedConfigs = visitedConfigs.difference(lPreviousConfigs)
 
     return root, len(visitedConfigs), visitedConfigs
 
 
-def exhaustive_search(numOfNodes, dryRun: bool = True):
-    configTree, numOfConfigs, lConfigNodes = generate_config_tree(
-        get_root(dryRun, numOfNodes), numOfNodes, 10000000
-    )
+# =====================
+# Indexed Design Space
+# =====================
+
+def iter_configs(numOfNodes: int, start: int = 0, stop: int = None, dryRun: bool = False):
+    """
+    Lazily yields the configurations with an index in [start, stop).
+    """
+    stop = get_design_space_size(numOfNodes) if stop is None else stop
+    for index in range(start, stop):
+        yield get_config_at(index, numOfNodes, dryRun)
+
+def parse_shard(text: str):
+    """
+    Parses a "k/n" shard description, k counts from 0 to n - 1. Used as argparse type, so an invalid
+    shard is reported as a usage error.
+
+    Returns:
+        tuple: (k, n)
+    """
+    message = f"Invalid shard {text}, expected k/n with 0 <= k < n"
+    try:
+        shard, numOfShards = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(message)
+    if numOfShards < 1 or not 0 <= shard < numOfShards:
+        raise argparse.ArgumentTypeError(message)
+    return shard, numOfShards
+
+def get_shard_range(numOfConfigs: int, shard: tuple = (0, 1)):
+    """
+    Splits the indices [0, numOfConfigs) into equal contiguous ranges and returns the one of the shard.
+
+    Returns:
+        tuple: (start, stop)
+    """
+    k, n = shard
+    return numOfConfigs * k // n, numOfConfigs * (k + 1) // n
+
+class ExhaustiveStrategy(SearchStrategy):
+    """
+    Asks for the configurations with an index in [start, stop) in order, a chunk per batch.
+    """
+    def __init__(self, numOfNodes: int, start: int = 0, stop: int = None):
+        self.numOfNodes = numOfNodes
+        self.next = start  # Index of the next configuration to ask for
+        self.stop = get_design_space_size(numOfNodes) if stop is None else stop
+
+    def ask(self, numOfConfigs: int = None):
+        if numOfConfigs is None:
+            numOfConfigs = EXHAUSTIVE_CHUNK_SIZE
+        stop = min(self.next + numOfConfigs, self.stop)
+        lConfigs = list(iter_configs(self.numOfNodes, self.next, stop))
+        self.next = stop
+        return lConfigs
+
+    def is_done(self):
+        return self.next >= self.stop
+
+def exhaustive_search(numOfNodes, dryRun: bool = True, shard: tuple = (0, 1), chunkSize: int = EXHAUSTIVE_CHUNK_SIZE):
+    """
+    Simulates every configuration of a number of nodes, or the part of them which belongs to a shard.
+    The configurations are generated and simulated in chunks, so memory use does not grow with the design space.
+
+    Args:
+        numOfNodes (int): Number of nodes.
+        dryRun (bool): Only count the configurations.
+        shard (tuple): (k, n) to run the k-th of n equal parts of the design space.
+        chunkSize (int): Number of configurations generated and simulated at once.
+
+    Returns:
+        int: Number of configurations in the shard.
+    """
+    start, stop = get_shard_range(get_design_space_size(numOfNodes), shard)
+    numOfConfigs = stop - start
     testName = f"exhaustive_search_{numOfNodes}_nodes.csv"
-    lConfigs = [node.config for node in lConfigNodes]
+    if shard[1] > 1:
+        testName = f"exhaustive_search_{numOfNodes}_nodes_shard_{shard[0]}_of_{shard[1]}.csv"
 
     print(f"{numOfNodes}Nodes has {numOfConfigs} configs")
 
     if not dryRun:
-        parallel_sims(lConfigs)
-
-        for config in lConfigs:
-            energy, avgLatency, throughput = analyze_results(config)
-            if energy and avgLatency and throughput:
-                config.write_results_to_csv(
-                    OUTPUT_DIR_BASE.joinpath(testName)
-                )
+        # The columnar copy is rewritten on every chunk and the result cache would keep every configuration in memory
+        evaluator = BatchEvaluator(testName, columnar=False, cache=False)
+        run_search(ExhaustiveStrategy(numOfNodes, start, stop), evaluator, chunkSize)
 
-    return configTree, numOfConfigs, lConfigs
+    return numOfConfigs
 
 
 def get_geometric_mean(*lInputs):
@@ -265,8 +388,11 @@ def get_geometric_mean(*lInputs):
     return result ** (1 / len(lInputs))
 
 
-def get_winners(sConfigNodes, winnerSampleSize, dryRun: bool = True, maxDepth:int = 5):
+def get_winners(sConfigNodes, winnerSampleSize, dryRun: bool = True, maxDepth:int = 5, policy: str = WINNER_POLICY):
     numOfConfig = len(sConfigNodes)
+    if dryRun:
+        # Nothing was simulated, any sample of the nodes will do
+        return set(list(sConfigNodes)[:winnerSampleSize])
     
     sHealthyNodes = set()
     for node in sConfigNodes:
@@ -275,10 +401,6 @@ def get_winners(sConfigNodes, winnerSampleSize, dryRun: bool = True, maxDepth:in
 
     if numOfConfig <= winnerSampleSize:
         return sHealthyNodes
-    elif dryRun:
-        newSet = {sConfigNodes.pop() for i in range(winnerSampleSize)}
-        sConfigNodes = sConfigNodes.union(newSet)
-        return newSet    
     else:
         lHealthyConfigs = []
 
@@ -287,202 +409,250 @@ def get_winners(sConfigNodes, winnerSampleSize, dryRun: bool = True, maxDepth:in
                 node.analyze()
 
             if node.analyzed and node.depth < maxDepth:
-                lHealthyConfigs.append(
-                    (
-                        get_geometric_mean(
-                            1/node.energy, 1/node.avgLatency, node.throughput
-                        ),
-                        node,
-                    )
-                )
+                lHealthyConfigs.append((node.geoMean, node))
 
-        lHealthyConfigs.sort(key=lambda x: x[0])
-        return set([config[1] for config in lHealthyConfigs[0:winnerSampleSize]])
+        lNodes = [config[1] for config in lHealthyConfigs]
+        lPoints = [get_objectives(len(node.code), node.energy, node.avgLatency, node.throughput) for node in lNodes]
+        return set(select_by_policy(lNodes, [config[0] for config in lHealthyConfigs], lPoints, winnerSampleSize, policy))
 
 
-def iterative_search(
-    numOfNodes, winnerSampleSize, iterations: int = 10, dryRun: bool = True
-):
-    sAllWinners = set()
-    testName = f"iterative_search_depth_{iterations}_sampsize_{winnerSampleSize}_{numOfNodes}_nodes.csv"
-    
-    dIterations = {it: IterationConfig() for it in range(iterations)}
+# =====================
+# Checkpoints
+# =====================
 
-    if not dryRun and os.path.isfile(OUTPUT_DIR_BASE.joinpath(testName)):
-        os.remove(OUTPUT_DIR_BASE.joinpath(testName))
-        
-    configTreeRoot = get_root(dryRun, numOfNodes)
-    if not dryRun:
-        single_sim(configTreeRoot.config)
-    sWinnerNodes = {configTreeRoot}
+def restore_search_state(state: SearchState, dryRun: bool = False):
+    """
+    Rebuilds the winners of a checkpointed search, their metrics come from the result store.
+
+    Returns:
+        tuple: (set of current winner nodes, set of all winner nodes)
+    """
+    sWinnerNodes = set()
+    for code, depth in state.lWinners:
+        winner = ConfigNode(parent=None, code=code, dryRun=dryRun)
+        winner.depth = depth
+        winner.analyze()
+        sWinnerNodes.add(winner)
+    sAllWinners = {ConfigNode(parent=None, code=code, dryRun=dryRun) for code in state.sAllWinners}
+    return sWinnerNodes, sAllWinners.union(sWinnerNodes)
+
+def save_search_progress(checkpointFile, state: SearchState, it: int, sWinnerNodes: set, sAllWinners: set):
+    """
+    Records a completed iteration in the checkpoint of the search.
+    """
+    state.iteration = it + 1
+    state.lWinners = [(winner.code, winner.depth) for winner in sWinnerNodes]
+    state.sAllWinners = {winner.code for winner in sAllWinners}
+    save_search_state(checkpointFile, state)
 
-    if not dryRun and os.path.isfile(
-        OUTPUT_DIR_BASE.joinpath(testName)
-    ):
-        os.remove(OUTPUT_DIR_BASE.joinpath(testName))
 
-    if configTreeRoot.analyze():
-        configTreeRoot.config.write_results_to_csv(
-            OUTPUT_DIR_BASE.joinpath(testName)
-        )
-        message = f"# Root geometric mean is: {get_geometric_mean(configTreeRoot.throughput, 1/configTreeRoot.avgLatency, 1/configTreeRoot.energy)} #"
-        print("".join(["#" for i in range(len(message))]))
-        print(message)
-        print("".join(["#" for i in range(len(message))]))
-        
-    else:
-        message = f"\nRoot could not be analyzed.\n"
-        print("".join(["#" for i in range(len(message))]))
-        print(message)
-        print("".join(["#" for i in range(len(message))]))
-
-    for it, iterationConfig in dIterations.items():
-        sTestedConfigs = set()
-        for winner in sWinnerNodes:
-            sTestedConfigs.add(winner)
-            # Generate configs which will be explored
-            root, numOfConfigs, lConfigNodes = generate_config_tree(
-                winner, numOfNodes, 1, sTestedConfigs
-            )
+# =====================
+# Iterative Searches
+# =====================
 
-            if not dryRun:
-                for node in lConfigNodes:
-                    node.config.set_iteration(it)
+class IterativeStrategy(SearchStrategy):
+    """
+    Greedy search through the configuration tree, every iteration simulates the configurations
+    which differ in a single attribute from the winners of the previous iteration.
+    The first batch is the root of the tree.
+    """
+    def __init__(self, numOfNodes, winnerSampleSize, iterations: int = 10, dryRun: bool = True,
+                 winnerPolicy: str = WINNER_POLICY, checkpointFile=None, state: SearchState = None, front: ParetoFront = None):
+        self.numOfNodes = numOfNodes
+        self.winnerSampleSize = winnerSampleSize
+        self.iterations = iterations
+        self.dryRun = dryRun
+        self.winnerPolicy = winnerPolicy
+        self.checkpointFile = checkpointFile  # Progress is saved here after every iteration, None to not save it
+        self.state = state if state is not None else SearchState()
+        self.sWinnerNodes = set()
+        self.sAllWinners = set()
+        self._rootDone = state is not None  # A resumed search does not evaluate the root again
+        if self._rootDone:
+            self.sWinnerNodes, self.sAllWinners = restore_search_state(self.state, dryRun)
+        self._lAsked = []  # Nodes of the configurations of the last batch
+        self._lChildren = []  # Children generated in the current iteration
+        self._sTestedConfigs = set()  # Winners and children of the current iteration
+        self.front = front  # Front the evaluator maintains over every batch, the winners under the "pareto" policy
+        self._dNodes = {}  # Key -> last node asked for with that configuration
+
+    def is_done(self):
+        return self._rootDone and self.state.iteration >= self.iterations
+
+    def ask(self, numOfConfigs: int = None):
+        if not self._rootDone:
+            self._lAsked = [get_root(self.dryRun, self.numOfNodes)]
+            return [node.config for node in self._lAsked]
+
+        it = self.state.iteration
+        self._sTestedConfigs = set()
+        lConfigNodes = []
+        for winner in self.sWinnerNodes:
+            self._sTestedConfigs.add(winner)
+            # Generate configs which will be explored
+            lConfigNodes += self.expand(winner)
+        self._sTestedConfigs.update(lConfigNodes)
 
-            iterationConfig.lConfigNodes += lConfigNodes
+        if not self.dryRun:
+            for node in lConfigNodes:
+                node.config.set_iteration(it)
 
-        message = f"{numOfNodes} Nodes, iteration {it} has {len(iterationConfig.lConfigNodes)} configs"
-        
-        # Update shared lists
+        message = f"{self.numOfNodes} Nodes, iteration {it} has {len(lConfigNodes)} configs"
         print("\n" + message)
         print("".join(["=" for i in range(len(message))]))
 
-        if dryRun:
-            sTestedConfigs = sTestedConfigs.union(lConfigNodes)
-            sTestedConfigs = sTestedConfigs.union(sWinnerNodes)
-            sWinnerNodes = get_winners(iterationConfig.lConfigNodes, winnerSampleSize, dryRun)
-        else:
-            runSims = parallel_sims(
-                [node.config for node in iterationConfig.lConfigNodes]
-            )
-            sTestedConfigs = sTestedConfigs.union(lConfigNodes)
-            sTestedConfigs = sTestedConfigs.union(sWinnerNodes)
-
-            numOfConfigsWithError = 0
-            for config in [node.config for node in sTestedConfigs]:
-                if contains_error(config):
-                    numOfConfigsWithError += 1
-                else:
-                    analyze_results(config)
-                    if config.get_metrics():
-                        config.write_results_to_csv(
-                            OUTPUT_DIR_BASE.joinpath(testName)
-                        )
-            print(
-                f"Out of {len(iterationConfig.lConfigNodes)} configs\n\t{len(runSims)} ran\n\t{len(iterationConfig.lConfigNodes) - len(runSims)} were already done\n\t{numOfConfigsWithError} ended with an error\n\t{len(iterationConfig.lConfigNodes) - numOfConfigsWithError} were successful\n"
-            )
+        # The winners are evaluated again so they compete with their children, the evaluator caches them
+        self._lAsked = lConfigNodes + list(self.sWinnerNodes)
+        self._lChildren = lConfigNodes
+        return [node.config for node in self._lAsked]
 
-            sWinnerNodes = get_winners(
-                iterationConfig.lConfigNodes, winnerSampleSize,
-                dryRun
-            )
-            sAllWinners = sAllWinners.union(sWinnerNodes)
+    def tell(self, lResults: list):
+        for node, (config, metrics) in zip(self._lAsked, lResults):
+            if metrics is not None:
+                node.analyze()
+                self._dNodes[config.get_key()] = node
 
-    return sAllWinners
+        if not self._rootDone:
+            self.tell_root(self._lAsked[0])
+            return
 
+        self.sWinnerNodes = self.select_winners()
+        self.sAllWinners = self.sAllWinners.union(self.sWinnerNodes)
+        if not self.dryRun and self.checkpointFile is not None:
+            save_search_progress(self.checkpointFile, self.state, self.state.iteration, self.sWinnerNodes, self.sAllWinners)
+        else:
+            self.state.iteration += 1
+
+    def tell_root(self, root: ConfigNode):
+        self._rootDone = True
+        self.sWinnerNodes = {root}
+        if root.analyzed:
+            message = f"# Root geometric mean is: {get_geometric_mean(root.throughput, 1/root.avgLatency, 1/root.energy)} #"
+            print("".join(["#" for i in range(len(message))]))
+            print(message)
+            print("".join(["#" for i in range(len(message))]))
+        elif not self.dryRun:
+            message = f"\nRoot could not be analyzed.\n"
+            print("".join(["#" for i in range(len(message))]))
+            print(message)
+            print("".join(["#" for i in range(len(message))]))
+
+    def expand(self, winner: ConfigNode):
+        root, numOfConfigs, lConfigNodes = generate_config_tree(
+            winner, self.numOfNodes, 1, self._sTestedConfigs
+        )
+        return list(lConfigNodes)
 
-def directed_iterative_search(
-    numOfNodes, winnerSampleSize, iterations: int = 10, dryRun: bool = True, maxDepth:int = 10
-):
-    sAllWinners = set()
-    testName = f"directed_iterative_search_depth_{iterations}_sampsize_{winnerSampleSize}_{numOfNodes}_nodes.csv"
-    
-    dIterations = {it: IterationConfig() for it in range(iterations)}
+    def get_candidates(self, lNodes):
+        # Nodes the evaluator could not analyze failed or were stopped early by successive halving
+        return lNodes if self.dryRun else [node for node in lNodes if node.analyzed]
 
-    # Run initial root
-    configTreeRoot = get_root(dryRun, numOfNodes)
-    
-    if not dryRun:
-        single_sim(configTreeRoot.config)
-    sWinnerNodes = {configTreeRoot}
+    def uses_front(self):
+        return self.winnerPolicy == "pareto" and self.front is not None and not self.dryRun
 
-    if not dryRun and os.path.isfile(
-        OUTPUT_DIR_BASE.joinpath(testName)
-    ):
-        os.remove(OUTPUT_DIR_BASE.joinpath(testName))
+    def get_front_winners(self, maxDepth: int = None):
+        """
+        Winners under the "pareto" policy: members of the front the evaluator maintains, instead of sorting
+        the candidates of an iteration again. The front is thinned by crowding distance when it holds more
+        than winnerSampleSize configurations.
 
-    if configTreeRoot.analyze():
-        configTreeRoot.config.write_results_to_csv(
-            OUTPUT_DIR_BASE.joinpath(testName)
-        )
-        message = f"# Root geometric mean is: {get_geometric_mean(configTreeRoot.throughput, 1/configTreeRoot.avgLatency, 1/configTreeRoot.energy)} #"
-        print("".join(["#" for i in range(len(message))]))
-        print(message)
-        print("".join(["#" for i in range(len(message))]))
-        
-    else:
-        f"\nRoot could not be analyzed.\n"
-        print("".join(["#" for i in range(len(message))]))
-        print(message)
-        print("".join(["#" for i in range(len(message))]))
-
-    for it, iterationConfig in dIterations.items():
-        sTestedConfigs = set()
-        for winner in sWinnerNodes:
-            sTestedConfigs.add(winner)
-            # Increase the depth of this winner
-            winner.depth += 1
+        Args:
+            maxDepth (int): Leave out nodes which reached this depth, None to keep all of them.
 
-            # Generate configs which will be explored
-            root, numOfConfigs, lConfigNodes = generate_config_tree(
-                winner, numOfNodes, winner.depth, sTestedConfigs
-            )
+        Returns:
+            set: ConfigNode objects of the winners.
+        """
+        lNodes, lPoints = [], []
+        for config, aPoint in zip(self.front.get_items(), self.front.get_points()):
+            node = self._dNodes.get(config.get_key())
+            if node is None:
+                # Configurations of an earlier run of a resumed search
+                node = ConfigNode(parent=None, code=get_code_from_config(config), dryRun=False)
+                node.analyze()
+                self._dNodes[config.get_key()] = node
+            if maxDepth is None or node.depth < maxDepth:
+                lNodes.append(node)
+                lPoints.append(aPoint)
+        aDistance = get_crowding_distance(lPoints)
+        return {lNodes[i] for i in np.argsort(-aDistance, kind="stable")[:self.winnerSampleSize]}
 
-            if not dryRun:
-                for node in lConfigNodes:
-                    node.config.set_iteration(it)
+    def select_winners(self):
+        if self.uses_front():
+            return self.get_front_winners()
+        return get_winners(self.get_candidates(self._lChildren), self.winnerSampleSize, self.dryRun, policy=self.winnerPolicy)
 
-            iterationConfig.lConfigNodes += lConfigNodes
 
-        message = f"{numOfNodes} Nodes, iteration {it} has {len(iterationConfig.lConfigNodes)} configs"
-        
-        # Update shared lists
-        print("\n" + message)
-        print("".join(["=" for i in range(len(message))]))
+class DirectedIterativeStrategy(IterativeStrategy):
+    """
+    Iterative search in which every winner explores one level deeper than in the previous iteration,
+    winners compete with their children and stop once they reach maxDepth.
+    """
+    def __init__(self, numOfNodes, winnerSampleSize, iterations: int = 10, dryRun: bool = True, maxDepth: int = 10,
+                 winnerPolicy: str = WINNER_POLICY, checkpointFile=None, state: SearchState = None, front: ParetoFront = None):
+        super().__init__(numOfNodes, winnerSampleSize, iterations, dryRun, winnerPolicy, checkpointFile, state, front)
+        self.maxDepth = maxDepth
+
+    def expand(self, winner: ConfigNode):
+        # Increase the depth of this winner
+        winner.depth += 1
+        root, numOfConfigs, lConfigNodes = generate_config_tree(
+            winner, self.numOfNodes, winner.depth, self._sTestedConfigs
+        )
+        return list(lConfigNodes)
 
-        if dryRun:
-            sTestedConfigs = sTestedConfigs.union(lConfigNodes)
-            sTestedConfigs = sTestedConfigs.union(sWinnerNodes)
-            sWinnerNodes = get_winners(sTestedConfigs, winnerSampleSize, dryRun)
+    def select_winners(self):
+        if self.uses_front():
+            sWinnerNodes = deepcopy(self.get_front_winners(self.maxDepth))
         else:
-            runSims = parallel_sims(
-                [node.config for node in iterationConfig.lConfigNodes]
-            )
-            sTestedConfigs = sTestedConfigs.union(lConfigNodes)
-            sTestedConfigs = sTestedConfigs.union(sWinnerNodes)
-
-            numOfConfigsWithError = 0
-            for config in [node.config for node in sTestedConfigs]:
-                if contains_error(config):
-                    numOfConfigsWithError += 1
-                else:
-                    analyze_results(config)
-                    if config.get_metrics():
-                        config.write_results_to_csv(
-                            OUTPUT_DIR_BASE.joinpath(testName)
-                        )
-
-            print(
-                f"Out of {len(iterationConfig.lConfigNodes)} configs\n\t{len(runSims)} ran\n\t{len(iterationConfig.lConfigNodes) - len(runSims)} were already done\n\t{numOfConfigsWithError} ended with an error\n\t{len(iterationConfig.lConfigNodes) - numOfConfigsWithError} were successful\n"
-            )
-
-            sWinnerNodes = deepcopy(get_winners(sTestedConfigs, winnerSampleSize,dryRun,maxDepth))
-            del sTestedConfigs
-        sAllWinners = sAllWinners.union(sWinnerNodes)
-
+            sWinnerNodes = deepcopy(get_winners(set(self.get_candidates(self._sTestedConfigs)), self.winnerSampleSize, self.dryRun, self.maxDepth, self.winnerPolicy))
         for i, winner in enumerate(sWinnerNodes):
+            if not winner.analyzed:
+                continue
             print(
                 f"\tWinner {i} with with geo-mean {get_geometric_mean(winner.throughput, 1/winner.avgLatency, 1/winner.energy)}:\t {winner.config.configName}:"
             )
-            
-        return sAllWinners
\ No newline at end of file
+        return sWinnerNodes
+
+
+def start_iterative_search(strategyClass, testName: str, dryRun: bool, resume: bool, fidelityRungs: int, **kwargs):
+    """
+    Runs an iterative strategy, continuing after the last completed iteration of an earlier run when resume is set.
+    """
+    checkpointFile = get_checkpoint_file(testName)
+    state = load_search_state(checkpointFile) if resume and not dryRun else None
+    if state is not None:
+        print(f"Resuming {testName} at iteration {state.iteration}")
+
+    # The table of the interrupted run is continued
+    evaluator = BatchEvaluator(testName, dryRun=dryRun, reset=state is None, fidelityRungs=fidelityRungs,
+                               policy=kwargs["winnerPolicy"])
+    if state is not None:
+        # Rows of the interrupted iteration were written before its checkpoint, it runs again
+        evaluator.sink.drop_iterations(state.iteration)
+        # The remaining rows are not written again when their configurations are asked for
+        evaluator.add_known([get_config_from_row(dRow) for dRow in evaluator.sink.read_rows()])
+    strategy = strategyClass(dryRun=dryRun, checkpointFile=checkpointFile, state=state, front=evaluator.front, **kwargs)
+    run_search(strategy, evaluator)
+    return strategy.sAllWinners
+
+
+def iterative_search(
+    numOfNodes, winnerSampleSize, iterations: int = 10, dryRun: bool = True, resume: bool = False,
+    winnerPolicy: str = WINNER_POLICY, fidelityRungs: int = FIDELITY_RUNGS
+):
+    testName = f"iterative_search_depth_{iterations}_sampsize_{winnerSampleSize}_{numOfNodes}_nodes.csv"
+    return start_iterative_search(
+        IterativeStrategy, testName, dryRun, resume, fidelityRungs, numOfNodes=numOfNodes, winnerSampleSize=winnerSampleSize,
+        iterations=iterations, winnerPolicy=winnerPolicy
+    )
+
+
+def directed_iterative_search(
+    numOfNodes, winnerSampleSize, iterations: int = 10, dryRun: bool = True, maxDepth:int = 10, resume: bool = False,
+    winnerPolicy: str = WINNER_POLICY, fidelityRungs: int = FIDELITY_RUNGS
+):
+    testName = f"directed_iterative_search_depth_{iterations}_sampsize_{winnerSampleSize}_{numOfNodes}_nodes.csv"
+    return start_iterative_search(
+        DirectedIterativeStrategy, testName, dryRun, resume, fidelityRungs, numOfNodes=numOfNodes, winnerSampleSize=winnerSampleSize,
+        iterations=iterations, maxDepth=maxDepth, winnerPolicy=winnerPolicy
+    )
@@ -1,4 +1,30 @@
+import argparse
 from analysis import *
+from dse import parse_shard
+from simulations import set_executor
+from distributed import DistributedExecutor, parse_address, get_authkey
+from constants import DISTRIBUTED_AUTHKEY_ENV
+
+parser = argparse.ArgumentParser(description="Design space exploration of the POOSL model")
+parser.add_argument("--shard", type=parse_shard, default=(0, 1),
+                    help="run only the k-th of n equal parts of the exhaustive search, given as k/n with 0 <= k < n")
+parser.add_argument("--resume", action="store_true",
+                    help="continue the iterative searches after their last completed iteration")
+parser.add_argument("--nsga2", action="store_true",
+                    help="also run the NSGA-II search on 5 and 6 nodes, which simulates every generation")
+parser.add_argument("--coordinator", type=parse_address, default=None,
+                    help="hand the simulations to workers started with 'python distributed.py host:port' instead of local processes, "
+                         "an empty host listens on 127.0.0.1 only")
+parser.add_argument("--authkey", default=None,
+                    help=f"shared secret of the coordinator and its workers, {DISTRIBUTED_AUTHKEY_ENV} is read when it is not given")
+args = parser.parse_args()
+
+if args.coordinator is not None:
+    authkey = get_authkey(args.authkey)
+    if authkey is None:
+        parser.error(f"--coordinator needs a shared secret, set {DISTRIBUTED_AUTHKEY_ENV} or pass --authkey")
+    set_executor(DistributedExecutor(args.coordinator, authkey))
+
 # =====================
 # Running the simulations
 # =====================
@@ -7,18 +33,22 @@ run_benchmark(1,2,3,4,5,6)
 
 analyse_original()
 
-exhaustive_search(1, 2)
+exhaustive_search(1, 2, shard=args.shard)
 
 dIterSettings ={
     "dryRun": False,
     "winnerSampleSize": 3,
     "iterations": 3,
-    "lNumOfNodes":[4, 5, 6]
+    "lNumOfNodes":[4, 5, 6],
+    "resume": args.resume
 }
-perform_iterative_search(**dIterSettings)
-perform_directed_iterative_search(maxDepth=3, **dIterSettings)
+sWinners = perform_iterative_search(**dIterSettings)
+sWinners = sWinners.union(perform_directed_iterative_search(maxDepth=3, **dIterSettings))
+if args.nsga2:
+    perform_nsga2_search([5, 6], dryRun=False)
 
-altered_mappings()
+# Other mappings of the winners of 4 and 5 nodes
+altered_mappings(sWinners)
 
 perform_priority_tests(get_priority_configs([
     "N4-PAd_Ad_Ad_MI-SFC_FC_FC_FC-V100_100_100_100",
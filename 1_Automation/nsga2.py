@@ -0,0 +1,212 @@
+import random
+from dataclasses import dataclass
+from platform_config import PlatformConfig
+from pareto import get_objectives, rank_winners
+from search import SearchStrategy, BatchEvaluator, run_search
+from dse import L_NODE_OPTIONS, LL_DIGIT_CHANGES, get_geometric_mean
+from constants import D_MAPPINGS, NSGA_POPULATION_SIZE, NSGA_GENERATIONS, FIDELITY_RUNGS
+
+L_TASKS = list(range(1, 12))  # Tasks of the application, Task1 first
+FAILED_OBJECTIVES = get_objectives(float("inf"), float("inf"), float("inf"), 0.0)  # Objectives of a failed simulation
+
+# =====================
+# Genome
+# =====================
+
+@dataclass(frozen=True)
+class Genome:
+    """
+    Complete description of a configuration for the evolutionary search.
+    """
+    code: tuple  # Index in get_node_options() of every node, see ConfigNode
+    mapping: tuple  # Node number of every task, Task1 first
+    priority: tuple  # Priority of every task, a permutation of 1 to 11
+
+def get_config_from_genome(genome: Genome):
+    lOptions = [L_NODE_OPTIONS[digit] for digit in genome.code]
+    config = PlatformConfig(
+        dMapping={f"MapTask{task}To": f"Node{node}" for task, node in zip(L_TASKS, genome.mapping)},
+        dPriority={f"PriorityTask{task}": str(priority) for task, priority in zip(L_TASKS, genome.priority)},
+        dProcessors={f"Node{i}ProcessorType": proc for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+        dSchedules={f"OSPolicy{i}": sched for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+        dVoltageScales={f"VSF{i}": volt for i, (proc, sched, volt) in enumerate(lOptions, start=1)},
+    )
+    # The default name only covers the nodes, append the mapping to tell the rows of the table apart
+    config.configName += "-M" + "".join(str(node) for node in genome.mapping)
+    return config
+
+def get_initial_genome(numOfNodes: int):
+    """
+    Returns the starting point of the iterative searches, the mapping of D_MAPPINGS on the first node option.
+    """
+    return Genome(
+        code=(0,) * numOfNodes,
+        mapping=tuple(int(D_MAPPINGS[f"{numOfNodes}Nodes"][f"MapTask{task}To"].removeprefix("Node")) for task in L_TASKS),
+        priority=tuple(L_TASKS),
+    )
+
+def get_random_genome(numOfNodes: int, rng: random.Random):
+    return Genome(
+        code=tuple(rng.randrange(len(L_NODE_OPTIONS)) for i in range(numOfNodes)),
+        mapping=tuple(rng.randint(1, numOfNodes) for task in L_TASKS),
+        priority=tuple(rng.sample(L_TASKS, len(L_TASKS))),
+    )
+
+# =====================
+# Operators
+# =====================
+
+def crossover(first: Genome, second: Genome, rng: random.Random):
+    """
+    Uniform crossover of the nodes and the mapping, order crossover of the priorities so they stay a permutation.
+    """
+    code = tuple(rng.choice(pair) for pair in zip(first.code, second.code))
+    mapping = tuple(rng.choice(pair) for pair in zip(first.mapping, second.mapping))
+
+    start, stop = sorted(rng.sample(range(len(L_TASKS) + 1), 2))
+    lSlice = first.priority[start:stop]
+    lRest = [priority for priority in second.priority if priority not in lSlice]
+    priority = tuple(lRest[:start]) + lSlice + tuple(lRest[start:])
+    return Genome(code, mapping, priority)
+
+def mutate(genome: Genome, numOfNodes: int, mutationRate: float, rng: random.Random):
+    """
+    Changes single attributes of nodes, moves tasks to other nodes and swaps priorities, each gene with probability mutationRate.
+    """
+    lCode = list(genome.code)
+    for i, digit in enumerate(lCode):
+        if rng.random() < mutationRate:
+            # Same single attribute change the iterative searches use
+            lCode[i] = rng.choice(LL_DIGIT_CHANGES[rng.randrange(3)][digit])
+
+    lMapping = list(genome.mapping)
+    for i in range(len(lMapping)):
+        if numOfNodes > 1 and rng.random() < mutationRate:
+            lMapping[i] = rng.choice([node for node in range(1, numOfNodes + 1) if node != lMapping[i]])
+
+    lPriority = list(genome.priority)
+    for i in range(len(lPriority)):
+        if rng.random() < mutationRate:
+            j = rng.randrange(len(lPriority))
+            lPriority[i], lPriority[j] = lPriority[j], lPriority[i]
+
+    return Genome(tuple(lCode), tuple(lMapping), tuple(lPriority))
+
+def tournament(lPopulation: list, dRank: dict, rng: random.Random):
+    """
+    Binary tournament with the crowded comparison of NSGA-II, the individual on the better front wins
+    and within a front the one with the larger crowding distance, see pareto.rank_winners.
+    """
+    first, second = rng.sample(lPopulation, 2)
+    return first if dRank[first] <= dRank[second] else second
+
+# =====================
+# Search
+# =====================
+
+class NSGA2Strategy(SearchStrategy):
+    """
+    Asks for the initial population first and then for one generation of offspring per batch.
+    Parents and offspring compete on non-dominated sorting and crowding distance over nodes,
+    energy, latency and throughput. The search ends early when no new offspring is found.
+    """
+    def __init__(self, numOfNodes: int, populationSize: int, generations: int, mutationRate: float, seed: int = None):
+        self.numOfNodes = numOfNodes
+        self.populationSize = populationSize
+        self.generations = generations
+        self.mutationRate = mutationRate
+        self.rng = random.Random(seed)
+        self.generation = 0  # Offspring generations told so far
+        self.numOfConfigs = 0  # Genomes evaluated so far
+        self.dObjectives = {}  # Genome -> objectives, every genome is evaluated once
+        self.dConfigs = {}  # Genome -> evaluated configuration
+        self.lPopulation = []  # Survivors of the last survival step
+        self.dRank = {}  # Survivor -> (front index, -crowding distance) of the last survival step
+        self._lAsked = []  # Genomes of the last batch
+        self._initialDone = False
+
+    def is_done(self):
+        return self._initialDone and self.generation >= self.generations
+
+    def ask(self, numOfConfigs: int = None):
+        if not self._initialDone:
+            # Start from the configuration of the iterative searches and random genomes
+            sPopulation = {get_initial_genome(self.numOfNodes)}
+            while len(sPopulation) < self.populationSize:
+                sPopulation.add(get_random_genome(self.numOfNodes, self.rng))
+            self._lAsked = list(sPopulation)
+        else:
+            sOffspring = set()
+            attempts = 0
+            # Near duplicates of known genomes are skipped, they would only repeat a simulation
+            while len(sOffspring) < self.populationSize and attempts < 10 * self.populationSize:
+                attempts += 1
+                child = crossover(tournament(self.lPopulation, self.dRank, self.rng), tournament(self.lPopulation, self.dRank, self.rng), self.rng)
+                child = mutate(child, self.numOfNodes, self.mutationRate, self.rng)
+                if child not in self.dObjectives:
+                    sOffspring.add(child)
+            self._lAsked = list(sOffspring)
+
+        for genome in self._lAsked:
+            self.dConfigs[genome] = get_config_from_genome(genome)
+        return [self.dConfigs[genome] for genome in self._lAsked]
+
+    def tell(self, lResults: list):
+        for genome, (config, metrics) in zip(self._lAsked, lResults):
+            if metrics is None:
+                self.dObjectives[genome] = FAILED_OBJECTIVES
+            else:
+                self.dObjectives[genome] = get_objectives(config.numOfNodes, *metrics)
+        self.numOfConfigs += len(self._lAsked)
+
+        lCandidates = self.lPopulation + self._lAsked
+        lRanked = rank_winners(lCandidates, [self.dObjectives[genome] for genome in lCandidates], self.populationSize)
+        self.lPopulation = [genome for genome, rank in lRanked]
+        self.dRank = dict(lRanked)
+        if not self._initialDone:
+            self._initialDone = True
+            return
+
+        message = f"{self.numOfNodes} Nodes, generation {self.generation} evaluated {len(self._lAsked)} configs, {self.numOfConfigs} in total"
+        print("\n" + message)
+        print("".join(["=" for i in range(len(message))]))
+        lBest = [self.dConfigs[genome] for genome in self.lPopulation if self.dObjectives[genome] != FAILED_OBJECTIVES]
+        for config in sorted(lBest, key=lambda config: config.get_geo_mean(), reverse=True)[:3]:
+            energy, avgLatency, throughput = config.get_metrics()
+            print(f"\tPopulation member with geo-mean {get_geometric_mean(throughput, 1/avgLatency, 1/energy)}:\t {config.configName}")
+        self.generation += 1
+
+def nsga2_search(numOfNodes: int, populationSize: int = NSGA_POPULATION_SIZE, generations: int = NSGA_GENERATIONS,
+                 mutationRate: float = None, dryRun: bool = True, seed: int = None, fidelityRungs: int = FIDELITY_RUNGS):
+    """
+    NSGA-II over the mapping, priorities, processors, schedules and voltages of a configuration.
+
+    Every generation is evaluated as one BatchEvaluator batch, genomes whose configurations only
+    differ by node numbering share a single simulation. Dry runs rank the genomes with the
+    analytic estimate of surrogate.py instead of simulating them.
+
+    Args:
+        numOfNodes (int): Number of nodes of every configuration.
+        populationSize (int): Number of individuals which survive every generation, at least 2.
+        generations (int): Number of offspring generations.
+        mutationRate (float): Probability to mutate a single gene, one over the number of genes by default.
+        dryRun (bool): Estimate the metrics instead of simulating.
+        seed (int): Seed of the random generator, to repeat a search.
+        fidelityRungs (int): Number of simulation lengths of the successive halving, see BatchEvaluator.
+
+    Returns:
+        list: Configurations of the final Pareto front.
+    """
+    if populationSize < 2:
+        # The binary tournament draws two different individuals
+        message = f"The population of the NSGA-II search needs at least 2 individuals, got {populationSize}"
+        print(message)
+        raise Exception(message)
+    if mutationRate is None:
+        mutationRate = 1 / (numOfNodes + 2 * len(L_TASKS))
+    testName = f"nsga2_search_pop_{populationSize}_gen_{generations}_{numOfNodes}_nodes.csv"
+
+    evaluator = BatchEvaluator(testName, dryRun=dryRun, columnar=False, fidelityRungs=fidelityRungs,
+                               policy="pareto", estimate=True)
+    run_search(NSGA2Strategy(numOfNodes, populationSize, generations, mutationRate, seed), evaluator)
+    return evaluator.front.get_items()
@@ -0,0 +1,210 @@
+import os
+import numpy as np
+from result_sink import ResultSink
+
+# =====================
+# Dominance
+# =====================
+# Every objective is minimized: number of nodes, energy, average latency and the negated throughput
+
+NUM_OF_OBJECTIVES = 4
+
+def get_objectives(numOfNodes, energy, avgLatency, throughput):
+    """
+    Returns the objective vector of a configuration, all of its entries are minimized.
+    """
+    return (numOfNodes, energy, avgLatency, -throughput)
+
+def get_non_dominated_mask(aPoints):
+    """
+    Marks the points which no other point dominates, points with equal objectives are all kept.
+
+    The points are visited by increasing sum, a point is never dominated by a point with a larger sum,
+    and every visit drops the points it dominates. The cost grows with the number of points times the
+    size of the front instead of the square of the number of points.
+
+    Args:
+        aPoints (np.ndarray): Objective vectors, one row per point.
+
+    Returns:
+        np.ndarray: Boolean mask, True for the non-dominated points.
+    """
+    aPoints = np.asarray(aPoints, dtype=float).reshape(-1, NUM_OF_OBJECTIVES)
+    aIndices = np.argsort(aPoints.sum(axis=1), kind="stable")
+    aRemaining = aPoints[aIndices]
+    i = 0
+    while i < len(aRemaining):
+        point = aRemaining[i]
+        aKeep = ~(np.all(aRemaining >= point, axis=1) & np.any(aRemaining > point, axis=1))
+        aIndices = aIndices[aKeep]
+        aRemaining = aRemaining[aKeep]
+        i = np.count_nonzero(aKeep[:i]) + 1
+
+    aMask = np.zeros(len(aPoints), dtype=bool)
+    aMask[aIndices] = True
+    return aMask
+
+def get_fronts(aPoints):
+    """
+    Fast non-dominated sorting, splits the points into successive fronts.
+
+    Returns:
+        list: Arrays of point indices, the first array is the Pareto front.
+    """
+    aPoints = np.asarray(aPoints, dtype=float).reshape(-1, NUM_OF_OBJECTIVES)
+    aRemaining = np.arange(len(aPoints))
+    lFronts = []
+    while len(aRemaining):
+        aMask = get_non_dominated_mask(aPoints[aRemaining])
+        lFronts.append(aRemaining[aMask])
+        aRemaining = aRemaining[~aMask]
+    return lFronts
+
+def get_crowding_distance(aPoints):
+    """
+    Sum over the objectives of the normalized distance between the neighbours of every point,
+    the boundary points get an infinite distance so the extremes of a front are kept.
+
+    Returns:
+        np.ndarray: The crowding distance of every point.
+    """
+    aPoints = np.asarray(aPoints, dtype=float).reshape(-1, NUM_OF_OBJECTIVES)
+    aDistance = np.zeros(len(aPoints))
+    if len(aPoints) < 3:
+        aDistance[:] = np.inf
+        return aDistance
+
+    for objective in range(aPoints.shape[1]):
+        aOrder = np.argsort(aPoints[:, objective], kind="stable")
+        aValues = aPoints[aOrder, objective]
+        aDistance[aOrder[[0, -1]]] = np.inf
+        span = aValues[-1] - aValues[0]
+        if 0 < span < np.inf:
+            aDistance[aOrder[1:-1]] += (aValues[2:] - aValues[:-2]) / span
+    return aDistance
+
+def rank_winners(lItems: list, aPoints, numOfWinners: int):
+    """
+    Survival step of NSGA-II: takes whole fronts until the next front does not fit, that front is thinned by crowding distance.
+    The crowding distance of every point is computed within its own front.
+
+    Args:
+        lItems (list): Items to select from, e.g. ConfigNode objects.
+        aPoints (np.ndarray): Objective vector of every item.
+        numOfWinners (int): Number of items to select.
+
+    Returns:
+        list: (item, rank) of the selected items, the rank is (front index, -crowding distance) and a smaller rank is better.
+    """
+    aPoints = np.asarray(aPoints, dtype=float).reshape(-1, NUM_OF_OBJECTIVES)
+    lWinners = []
+    for frontIndex, aFront in enumerate(get_fronts(aPoints)):
+        aDistance = get_crowding_distance(aPoints[aFront])
+        aOrder = np.argsort(-aDistance, kind="stable")[:numOfWinners - len(lWinners)]
+        lWinners += [(lItems[aFront[i]], (frontIndex, -aDistance[i])) for i in aOrder]
+        if len(lWinners) >= numOfWinners:
+            break
+    return lWinners
+
+def select_winners(lItems: list, aPoints, numOfWinners: int):
+    """
+    Selects the items of the best fronts, see rank_winners.
+
+    Returns:
+        list: The selected items.
+    """
+    return [item for item, rank in rank_winners(lItems, aPoints, numOfWinners)]
+
+def select_by_policy(lItems: list, lGeoMeans: list, lPoints: list, numOfWinners: int, policy: str):
+    """
+    Selects the best items under a winner policy, shared by every search which ranks configurations.
+
+    Args:
+        lItems (list): Items to select from, e.g. ConfigNode objects.
+        lGeoMeans (list): Geometric mean of every item, higher is better.
+        lPoints (list): Objective vector of every item, see get_objectives.
+        numOfWinners (int): Number of items to select.
+        policy (str): "geomean" keeps the highest geometric means, "pareto" uses select_winners.
+
+    Returns:
+        list: The selected items, best first for the "geomean" policy.
+    """
+    if policy == "pareto":
+        return select_winners(lItems, lPoints, numOfWinners)
+    elif policy == "geomean":
+        lOrder = sorted(range(len(lItems)), key=lambda i: lGeoMeans[i], reverse=True)
+        return [lItems[i] for i in lOrder[:numOfWinners]]
+    else:
+        message = f"Unknown winner policy {policy}"
+        print(message)
+        raise Exception(message)
+
+# =====================
+# Incremental Front
+# =====================
+
+class ParetoFront:
+    """
+    Non-dominated set of all results added so far.
+
+    A batch is first reduced to its own front and then merged with the current front, so the
+    work per batch depends on the batch and the front, not on every configuration evaluated before.
+    """
+    def __init__(self):
+        self._aPoints = np.empty((0, NUM_OF_OBJECTIVES))  # Objective vectors of the front
+        self._lItems = []  # Item of every row of _aPoints
+
+    def add(self, lItems: list, aPoints):
+        """
+        Adds a batch of results.
+
+        Args:
+            lItems (list): Items of the batch, e.g. PlatformConfig objects.
+            aPoints (np.ndarray): Objective vector of every item.
+
+        Returns:
+            int: Number of items of the batch which are on the front afterwards.
+        """
+        aPoints = np.asarray(aPoints, dtype=float).reshape(-1, NUM_OF_OBJECTIVES)
+        if not len(aPoints):
+            return 0
+        aBatchMask = get_non_dominated_mask(aPoints)
+        lItems = [item for item, keep in zip(lItems, aBatchMask) if keep]
+
+        aCombined = np.vstack([self._aPoints, aPoints[aBatchMask]])
+        aMask = get_non_dominated_mask(aCombined)
+        lCombined = self._lItems + lItems
+        self._aPoints = aCombined[aMask]
+        self._lItems = [item for item, keep in zip(lCombined, aMask) if keep]
+        return int(np.count_nonzero(aMask[len(aMask) - len(lItems):]))
+
+    def add_configs(self, lConfigs: list):
+        """
+        Adds configurations with metrics, configurations without valid metrics are skipped.
+        """
+        lItems, lPoints = [], []
+        for config in lConfigs:
+            energy, avgLatency, throughput = config.get_metrics()
+            if energy and avgLatency and throughput:
+                lItems.append(config)
+                lPoints.append(get_objectives(config.numOfNodes, energy, avgLatency, throughput))
+        return self.add(lItems, lPoints)
+
+    def get_items(self):
+        return list(self._lItems)
+
+    def get_points(self):
+        return self._aPoints.copy()
+
+    def __len__(self):
+        return len(self._lItems)
+
+    def write(self, file):
+        """
+        Writes the front as a result table, an existing table is replaced.
+        """
+        if os.path.isfile(file):
+            os.remove(file)
+        with ResultSink(file, columnar=False) as sink:
+            for config in self._lItems:
+                sink.add(config)
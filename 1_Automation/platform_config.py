@@ -1,18 +1,118 @@
 import os
 import re
+import json
+import hashlib
 from power import PowerMeasurements
 from timing import TaskTiming, TimingMeasurements
-from constants import MODEL_TEMPLATE, SIM_TIME, OUTPUT_DIR_BASE
+from result_sink import ResultSink
+from constants import MODEL_TEMPLATE, SIM_TIME, SIM_STOP_MODE, SIM_ACCURACY, SIM_CONFIDENCE_LEVEL, SIM_CONFIDENCE_TIME, OUTPUT_DIR_BASE, FLAT_OUTPUT_DIRS, OUTPUT_MANIFEST_FILE
 
 # =====================
 # Platform Configuration class
 # =====================
 
+_NON_DIGITS = re.compile(r'[^0-9]')
+_NUMBERS = re.compile(r'[0-9]+')
+
 def get_geometric_mean(*lInputs):
     result = 1
     for input in lInputs:
         result *= input
     return result ** (1 / len(lInputs))
+
+def get_voltage_percentage(volt):
+    numerator, denominator = volt.split('/')
+    return str(int(100*float(numerator)/float(denominator)))
+
+# =====================
+# Canonical Form
+# =====================
+
+def get_node_relabeling(dMapping: dict, dProcessors: dict, dSchedules: dict, dVoltageScales: dict):
+    """
+    Numbers the nodes in a way which does not depend on how they were labeled.
+    
+    Used nodes are numbered in the order in which the tasks are mapped onto them, Task1 first.
+    Unused nodes follow, ordered by their processor, schedule and voltage.
+    
+    Returns:
+        dict: Old node number -> new node number, both as strings.
+    """
+    lNodes = []
+    for label, node in sorted(dMapping.items(), key=lambda x: tuple(int(n) for n in _NUMBERS.findall(x[0]))):
+        number = _NON_DIGITS.sub("", node)
+        if number not in lNodes:
+            lNodes.append(number)
+    
+    lUnused = [_NON_DIGITS.sub("", label) for label in dProcessors if _NON_DIGITS.sub("", label) not in lNodes]
+    lNodes += sorted(lUnused, key=lambda n: (dProcessors.get(f"Node{n}ProcessorType", ""), dSchedules.get(f"OSPolicy{n}", ""), dVoltageScales.get(f"VSF{n}", "")))
+    return {old: str(new) for new, old in enumerate(lNodes, start=1)}
+
+def get_canonical_params(dMapping: dict, dProcessors: dict, dSchedules: dict, dVoltageScales: dict):
+    """
+    Relabels the nodes of a configuration to its canonical numbering, configurations which only differ
+    in the numbering of their nodes describe the same system and share one canonical form.
+    
+    Returns:
+        tuple: (dMapping, dProcessors, dSchedules, dVoltageScales) with the nodes renumbered.
+    """
+    dRelabel = get_node_relabeling(dMapping, dProcessors, dSchedules, dVoltageScales)
+    
+    def relabel(label):
+        return _NUMBERS.sub(lambda match: dRelabel.get(match.group(0), match.group(0)), label)
+    
+    return (
+        {label: relabel(node) for label, node in dMapping.items()},
+        {relabel(label): value for label, value in dProcessors.items()},
+        {relabel(label): value for label, value in dSchedules.items()},
+        {relabel(label): value for label, value in dVoltageScales.items()},
+    )
+
+def get_unique_configs(lConfigs: list):
+    """
+    Drops configurations which are equivalent to an earlier one in the list.
+    
+    Args:
+        lConfigs (list): PlatformConfig objects.
+        
+    Returns:
+        list: The first configuration of every canonical key, in the original order.
+    """
+    dUnique = {}
+    for config in lConfigs:
+        dUnique.setdefault(config.get_key(), config)
+    return list(dUnique.values())
+
+# =====================
+# Output Manifest
+# =====================
+
+_sManifestHashes = None  # Hashes already present in the manifest file
+
+def update_manifest(lConfigs: list):
+    """
+    Appends the configurations which are not yet listed to the manifest of the content addressed output directories.
+    
+    Args:
+        lConfigs (list): PlatformConfig objects which are about to be simulated.
+    """
+    global _sManifestHashes
+    if _sManifestHashes is None:
+        _sManifestHashes = set()
+        if os.path.isfile(OUTPUT_MANIFEST_FILE):
+            with open(OUTPUT_MANIFEST_FILE, "r") as f:
+                _sManifestHashes = {json.loads(line)["hash"] for line in f if line.strip()}
+    
+    lNewEntries = []
+    for config in lConfigs:
+        if config.keyHash not in _sManifestHashes:
+            _sManifestHashes.add(config.keyHash)
+            lNewEntries.append(json.dumps(config.get_manifest_entry()) + "\n")
+    
+    if lNewEntries:
+        os.makedirs(OUTPUT_DIR_BASE, exist_ok=True)
+        with open(OUTPUT_MANIFEST_FILE, "a") as f:
+            f.writelines(lNewEntries)
     
 class PlatformConfig:
     """ 
@@ -26,12 +126,21 @@ class PlatformConfig:
         dVoltageScales (dict): Voltage scaling factors.
         iteration (int): Iteration number for configuration identification.
         configName (str): Name of the configuration.
+        simTime (str): Simulated time in seconds, shorter than SIM_TIME for a cheap low fidelity run.
+            In confidence mode it is capped at SIM_CONFIDENCE_TIME.
         outputDir (Path): Directory where results will be stored.
+        dEstimates (dict): Interval estimates of the application monitors when SIM_STOP_MODE is "confidence".
     """
 
     def __init__(self, dMapping: dict, dPriority: dict, dProcessors: dict, 
-                 dSchedules: dict, dVoltageScales: dict, iteration: int = 0, configName: str = None):
+                 dSchedules: dict, dVoltageScales: dict, iteration: int = 0, configName: str = None,
+                 simTime: str = SIM_TIME):
         self.applicationType = "application"
+        if SIM_STOP_MODE == "confidence" and float(simTime) > float(SIM_CONFIDENCE_TIME):
+            # The model only ends once every trace observer closed, so the traced window is kept short
+            # and the application monitors decide how long the simulation runs beyond it
+            simTime = SIM_CONFIDENCE_TIME
+        self.simTime = simTime
         self.iteration = iteration
         self.numOfNodes = len(dProcessors)  # Number of processing nodes in the configuration
         self.dMapping = dMapping
@@ -39,8 +148,12 @@ class PlatformConfig:
         self.dProcessors = dProcessors
         self.dSchedules = dSchedules
         self.dVoltageScales = dVoltageScales
-        self._measPower = PowerMeasurements()  # Initialize power measurement tracking
+        self._measPower = PowerMeasurements(simTime=float(simTime))  # Initialize power measurement tracking
         self._measTiming = TimingMeasurements()  # Initialize timing measurement tracking
+        self._metrics = None  # Cached (energy, latency, throughput), None while it has to be recomputed
+        self._geoMean = None  # Cached geometric mean, None while it has to be recomputed
+        self._reduced = False  # True once the traces were reduced, e.g. by a simulation worker
+        self.dEstimates = {}  # "throughput" and "latency" -> MonitorEstimate of the application monitors
         self._get_name()
         if configName is not None:
             self.configName = configName
@@ -52,12 +165,36 @@ class PlatformConfig:
         self.configName  = f"N{self.numOfNodes}"
         self.configName += f"-P" + "_".join([proc[0:2] for proc in lProc])
         self.configName += f"-S" + "_".join([sched[0:2] for sched in lSched])
-        self.configName += f"-V" + "_".join([str(int(100*float(volt.split('/')[0])/float(volt.split('/')[1]))) for volt in lVolt])
+        self.configName += f"-V" + "_".join([get_voltage_percentage(volt) for volt in lVolt])
+        self._update_key()
+        
+    def _update_key(self):
+        """
+        Precomputes the canonical key, its hash and the output directory after the parameters changed.
+        The key is built from the canonical form, so relabeled copies of a configuration share it.
+        """
+        dMapping, dProcessors, dSchedules, dVoltageScales = get_canonical_params(
+            self.dMapping, self.dProcessors, self.dSchedules, self.dVoltageScales)
+        # The simulated time is always part of the key, results stay tied to it when SIM_TIME changes
+        lParts = [self.applicationType, f"simTime={self.simTime}"]
+        if SIM_STOP_MODE == "confidence":
+            # Latency and throughput come from the monitors, results of the two modes are kept apart
+            lParts.append(f"confidence={SIM_ACCURACY},{SIM_CONFIDENCE_LEVEL}")
+        self.key = "|".join(lParts + [
+            ",".join(f"{label}={value}" for label, value in sorted(dParams.items()))
+            for dParams in [dMapping, self.dPriority, dProcessors, dSchedules, dVoltageScales]
+        ])
+        self.keyHash = hashlib.sha1(self.key.encode()).hexdigest()[:16]
         self.get_output_dir()
       
     def get_output_dir(self):
-        lMap = ["T" + "".join(re.findall(r'[0-9]', name)) + "-N" + "".join(re.findall(r'[0-9]', value)) for name, value in  self.dMapping.items()]
-        lPri = ["T" + "".join(re.findall(r'[0-9]', name)) + "-P" + "".join(re.findall(r'[0-9]', value)) for name, value in  self.dPriority.items()]
+        if FLAT_OUTPUT_DIRS:
+            # Content addressed directory, the manifest maps the hash back onto the parameters
+            self.outputDir = OUTPUT_DIR_BASE.joinpath(f"{self.numOfNodes}Nodes", self.keyHash)
+            return self.outputDir
+        
+        lMap = ["T" + _NON_DIGITS.sub("", name) + "-N" + _NON_DIGITS.sub("", value) for name, value in  self.dMapping.items()]
+        lPri = ["T" + _NON_DIGITS.sub("", name) + "-P" + _NON_DIGITS.sub("", value) for name, value in  self.dPriority.items()]
         lProc = [val[1] for val in sorted([(name, value) for name, value in  self.dProcessors.items()], key=lambda x : x[0])]
         lSched = [val[1] for val in sorted([(name, value) for name, value in  self.dSchedules.items()], key=lambda x : x[0])]
         lVolt = [val[1] for val in sorted([(name, value) for name, value in  self.dVoltageScales.items()], key=lambda x : x[0])]
@@ -68,11 +205,46 @@ class PlatformConfig:
             f"Pri" + "_".join(lPri),
             f"Pro" + "_".join([proc[0:2] for proc in lProc]),
             f"Sched" + "_".join([sched[0:2] for sched in lSched]),
-            f"Volt" + "_".join([str(int(100*float(volt.split('/')[0])/float(volt.split('/')[1]))) for volt in lVolt])
+            f"Volt" + "_".join([get_voltage_percentage(volt) for volt in lVolt])
         )
+        # Simulations of every length are kept next to each other instead of inside one another's directory
+        self.outputDir = self.outputDir.with_name(f"{self.outputDir.name}-Time{self.simTime}")
+        if SIM_STOP_MODE == "confidence":
+            self.outputDir = self.outputDir.with_name(f"{self.outputDir.name}-Conf{SIM_ACCURACY}_{SIM_CONFIDENCE_LEVEL}")
         
         return self.outputDir
       
+    def get_key(self):
+        """
+        Returns the canonical key which identifies the configuration independent of the order of its parameters
+        and of the numbering of its nodes.
+        
+        Returns:
+            str: The canonical key.
+        """
+        return self.key
+    
+    def get_manifest_entry(self):
+        """
+        Describes the configuration for the manifest of the content addressed output directories.
+        
+        Returns:
+            dict: Hash, key and parameters of the configuration.
+        """
+        return {
+            "hash": self.keyHash,
+            "key": self.key,
+            "configName": self.configName,
+            "applicationType": self.applicationType,
+            "simTime": self.simTime,
+            "stopMode": SIM_STOP_MODE,
+            "dMapping": self.dMapping,
+            "dPriority": self.dPriority,
+            "dProcessors": self.dProcessors,
+            "dSchedules": self.dSchedules,
+            "dVoltageScales": self.dVoltageScales,
+        }
+      
     def get_model(self):
         """ 
         Generates a simulation model based on the configuration parameters.
@@ -83,7 +255,9 @@ class PlatformConfig:
         return MODEL_TEMPLATE.format(params={
             "application":         self.applicationType,
             "numOfNodes":          str(len(self.dProcessors)),
-            "simTime":             SIM_TIME,
+            "simTime":             self.simTime,
+            "accuracy":            SIM_ACCURACY,
+            "confidenceLevel":     SIM_CONFIDENCE_LEVEL,
             "mapping":             "".join([f"\t\t{label} := \"{value}\",\n" for label, value in self.dMapping.items()]),
             "processorAssignment": "".join([f"\t\t{label} := \"{value}\",\n" for label, value in self.dProcessors.items()]),
             "scheduleAssignment":  "".join([f"\t\t{label} := \"{value}\",\n" for label, value in self.dSchedules.items()]),
@@ -100,83 +274,106 @@ class PlatformConfig:
             task (TaskTiming): Task timing information.
         """
         self._measTiming.add_measurement(task)
+        self._invalidate_metrics()
+        
+    def add_power_meas(self, difference, time):
+        """
+        Adds a power change to the configuration.
+        
+        Args:
+            difference (float): Power difference at a given time.
+            time (float): The time at which power change occurs.
+        """
+        self._measPower.update_ltPower(difference, time)
+        self._invalidate_metrics()
+        
+    def _invalidate_metrics(self):
+        self._metrics = None
+        self._geoMean = None
+        self._reduced = False
         
     def get_metrics(self):
         """
-        Retrieves system performance metrics including power, energy, latency, and throughput.
+        Retrieves system performance metrics including energy, latency, and throughput.
+        The metrics are cached until a new measurement is added.
+        
+        Returns:
+            tuple: (total energy, average latency, throughput)
+        """
+        if self._metrics is None:
+            self._metrics = (self._measPower.get_energy(), self._measTiming.get_avg_latency(), self._measTiming.get_throughput())
+        return self._metrics
+    
+    def get_geo_mean(self):
+        """
+        Retrieves the geometric mean of 1/nodes, 1/energy, 1/latency and throughput which is used to rank configurations.
+        The value is cached until a new measurement is added.
+        
+        Returns:
+            float: The geometric mean.
+        """
+        if self._geoMean is None:
+            energy, avgLatency, throughput = self.get_metrics()
+            self._geoMean = get_geometric_mean(1/self.numOfNodes, 1/energy, 1/avgLatency, throughput)
+        return self._geoMean
+    
+    def set_metrics(self, energy, avgLatency, throughput):
+        """
+        Stores metrics which were reduced from the traces or computed elsewhere, e.g. inside a simulation worker process.
+        
+        Args:
+            energy (float): Total energy consumption.
+            avgLatency (float): Average latency.
+            throughput (float): Throughput.
+        """
+        self._invalidate_metrics()
+        self._metrics = (energy, avgLatency, throughput)
+        self._reduced = True
+        
+    def reduce_measurements(self):
+        """
+        Reduces the measurements after they were fed directly, e.g. by the streaming trace parsers, and keeps the metrics.
         
         Returns:
-            tuple: (power trace, total energy, average latency, throughput)
+            tuple: (total energy, average latency, throughput)
         """
-        return self._measPower.get_energy(), self._measTiming.get_avg_latency(), self._measTiming.get_throughput()
+        self._invalidate_metrics()
+        metrics = self.get_metrics()
+        self._reduced = True
+        return metrics
+        
+    def has_metrics(self):
+        return self._reduced
     
     def set_iteration(self, iteration):
         self.iteration = iteration
+        
+    def set_application_type(self, applicationType):
+        self.applicationType = applicationType
+        self._update_key()
+        
+    def get_copy_with_sim_time(self, simTime: str):
+        """
+        Creates the same configuration with another simulated time and without measurements.
+        
+        Args:
+            simTime (str): Simulated time in seconds.
+        
+        Returns:
+            PlatformConfig: The copy, it has its own key and output directory.
+        """
+        config = PlatformConfig(self.dMapping, self.dPriority, self.dProcessors, self.dSchedules,
+                                self.dVoltageScales, self.iteration, self.configName, simTime)
+        config.set_application_type(self.applicationType)
+        return config
     
     def write_results_to_csv(self, file):
-        if os.path.isfile(file):
-            f = open(file, "a")
-        else:
-            f = open(file, "w")
-            f.write(f"&;")
-            f.write("\\rot\{Geometric Mean\}&;")
-            f.write("\\rot\{Nodes\}&;")
-            f.write("\\rot\{Energy\}&;")
-            f.write("\\rot\{Average Latency\}&;")
-            f.write("\\rot\{Throughput\}&;")
-            f.write("\\rot\{Iteration\}&;")
-            for i in range(1,7):
-                f.write("\\multicolumn\{3\}\{|c||\}\{" + f"Node {i}" + "\}")
-                
-            for i in range(1,12):
-                f.write("\\multicolumn\{2\}\{|c||\}\{" + f"Task {i}" + "\}")
-                
-            f.write("\\\\\n")
-            
-            f.write("&;")
-            f.write("&;")
-            f.write("&;")
-            f.write("&;")
-            f.write("&;")
-            f.write("&;")
-            f.write("&;")
-            for i in range(1,7):
-                f.write("\\rot\{Processor\}&;")
-                f.write("\\rot\{Schedule\}&;")
-                f.write("\\rot\{Voltage [\%]\}&;")
-                
-            for i in range(1,12):
-                f.write("\\rot\{Node\}&;")
-                f.write("\\rot\{Priority\}&;")
-                
-            f.write("\\\\\n")
-
-        f.write(f"&;")
-        f.write(f"{get_geometric_mean(1/self.numOfNodes, 1/self._measPower.get_energy(), 1/self._measTiming.get_avg_latency(), self._measTiming.get_throughput())}&;")
-        f.write(f"{self.numOfNodes}&;")
-        f.write(f"{self._measPower.get_energy()}&;")
-        f.write(f"{self._measTiming.get_avg_latency()}&;")
-        f.write(f"{self._measTiming.get_throughput()}&;")
-        f.write(f"{self.iteration}&;")
-        for i in range(1,self.numOfNodes+1):
-            processor = self.dProcessors[f"Node{i}ProcessorType"]
-            f.write(f"{processor}&;")
-            schedules = self.dSchedules[f"OSPolicy{i}"]
-            f.write(f"{schedules}&;")
-            voltageScales = self.dVoltageScales[f"VSF{i}"]
-            f.write(f"{voltageScales}&;")
-            
-        if self.numOfNodes < 7:
-            f.write(f"&;")
-            f.write(f"&;")
-            f.write(f"&;")
-            
-        for i in range(1,12):
-            mapping = self.dMapping[f"MapTask{i}To"]
-            f.write(f"{mapping}&;")
-            priority = self.dPriority[f"PriorityTask{i}"]
-            f.write(f"{priority}&;")
-        
-        f.write("\\\\\n")
-                    
-        f.close()
+        """
+        Appends the results of this configuration to a "&;" separated table.
+        Searches which write many rows should keep a ResultSink open instead.
+        
+        Args:
+            file (Path): The table to append to, the header is written when it does not exist yet.
+        """
+        with ResultSink(file, columnar=False) as sink:
+            sink.add(self)
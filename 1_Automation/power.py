@@ -1,3 +1,4 @@
+import numpy as np
 from constants import SIM_TIME
 from dataclasses import dataclass, field
 
@@ -10,13 +11,29 @@ from dataclasses import dataclass, field
 class PowerMeasurements:
     """
     Stores power usage information during simulation, tracking energy consumption over time.
+
+    The (time, difference) samples are accumulated in growing NumPy buffers, the energy is
+    integrated in one vectorized pass and cached until new samples arrive.
     """
-    _dDifference: dict = field(default_factory=dict)  # Stores power difference at different times
+    _aTime: np.ndarray = field(default_factory=lambda: np.empty(1024))  # Times at which the power changes
+    _aDifference: np.ndarray = field(default_factory=lambda: np.empty(1024))  # Power difference at those times
+    _numOfSamples: int = 0  # Number of used entries in the buffers
     _ltPower: list = field(default_factory=list)  # List of power readings over time
-    _energy: float = 0.0  # Total energy consumption
+    _energy: float = None  # Total energy consumption, None while it has to be recomputed
     startTime: float = float('inf')  # Earliest recorded time
     stopTime: float = 0.0  # Latest recorded time
-    
+    simTime: float = float(SIM_TIME)  # End of the simulation, the last power level holds until then
+
+    def _reserve(self, numOfSamples):
+        """
+        Grows the buffers so that numOfSamples more samples fit in them.
+        """
+        required = self._numOfSamples + numOfSamples
+        if required > len(self._aTime):
+            capacity = max(required, 2 * len(self._aTime))
+            self._aTime = np.resize(self._aTime, capacity)
+            self._aDifference = np.resize(self._aDifference, capacity)
+
     def update_ltPower(self, difference, time):
         """
         Updates power consumption data.
@@ -24,51 +41,91 @@ class PowerMeasurements:
             difference (float): Power difference at a given time.
             time (float): The time at which power change occurs.
         """
-        if float(time) not in self._dDifference.keys():
-            self._dDifference[float(time)] = float(difference)
-        else:
-            self._dDifference[float(time)] += float(difference)
-            
-        self.startTime = min(float(time), self.startTime)
-        self.stopTime = max(float(time), self.stopTime)
-        
+        time = float(time)
+        self._reserve(1)
+        self._aTime[self._numOfSamples] = time
+        self._aDifference[self._numOfSamples] = float(difference)
+        self._numOfSamples += 1
+        self._energy = None
+
+        self.startTime = min(time, self.startTime)
+        self.stopTime = max(time, self.stopTime)
+
+    def update_ltPower_bulk(self, lDifference, lTime):
+        """
+        Adds many power changes at once.
+        Args:
+            lDifference (array-like): Power differences.
+            lTime (array-like): The times at which the power changes occur.
+        """
+        aDifference = np.asarray(lDifference, dtype=float)
+        aTime = np.asarray(lTime, dtype=float)
+        if len(aTime) == 0:
+            return
+
+        self._reserve(len(aTime))
+        self._aTime[self._numOfSamples:self._numOfSamples + len(aTime)] = aTime
+        self._aDifference[self._numOfSamples:self._numOfSamples + len(aTime)] = aDifference
+        self._numOfSamples += len(aTime)
+        self._energy = None
+
+        self.startTime = min(float(aTime.min()), self.startTime)
+        self.stopTime = max(float(aTime.max()), self.stopTime)
+
+    def _get_power_steps(self):
+        """
+        Sorts the samples and turns the differences into the power level after each distinct time.
+        Returns:
+            tuple: (times, power levels) as NumPy arrays.
+        """
+        aTime = self._aTime[:self._numOfSamples]
+        aOrder = np.argsort(aTime, kind="stable")
+        aTime = aTime[aOrder]
+        aPower = np.cumsum(self._aDifference[:self._numOfSamples][aOrder])
+
+        # Multiple changes at the same time form one step, keep the level after the last of them
+        aTime, aFirst = np.unique(aTime, return_index=True)
+        aLast = np.append(aFirst[1:] - 1, len(aPower) - 1)
+        return aTime, aPower[aLast]
+
     def get_ltPower_trace(self):
         """
         Generates a power trace (time vs. power).
         Returns:
             list: Power measurements over time.
         """
-        lTrace = sorted([(time, difference) for time, difference in self._dDifference.items()], key=lambda diff: diff[0])
-        
-        self._ltPower = []
-        self._ltPower.append((0.0, 0.0))  # Initial power at time 0
-        for i in range(0, len(lTrace)):
-            self._ltPower.append((lTrace[i][0], self._ltPower[i][1] + lTrace[i][1]))
-        
-        self._ltPower.sort(key=lambda x: x[0])
-        
+        aTime, aPower = self._get_power_steps()
+
+        self._ltPower = [(0.0, 0.0)]  # Initial power at time 0
+        self._ltPower += list(zip(aTime.tolist(), aPower.tolist()))
+
         return self._ltPower
-        
+
     def get_energy(self):
         """
         Computes total energy consumption over the simulation period.
         Returns:
             float: Total energy usage.
         """
-        power = self.get_ltPower_trace()
-        
+        if self._energy is not None:
+            return self._energy
+
         self._energy = 0.0
-        if len(power):
-            for i in range(len(power)-2):
-                self._energy += power[i][1] * (power[i+1][0] - power[i][0])
-                if self._energy < 0:
-                    raise Exception(f"Improbable energy consumption {self._energy} between {power[i][0]} and {power[i+1][0]} mininum power is {min([time[1] for time in power])}")
-                
-                if float(SIM_TIME) > power[-1][0]:
-                    self._energy += power[-1][1] * (float(SIM_TIME) - power[-1][0])
-                
-        
+        if self._numOfSamples:
+            aTime, aPower = self._get_power_steps()
+
+            # Each power level holds until the next change, the last one until the end of the simulation
+            aDuration = np.diff(np.append(aTime, max(self.simTime, aTime[-1])))
+            self._energy = float(np.dot(aPower, aDuration))
+
+            if aPower.min() < 0:
+                aEnergy = np.cumsum(aPower * aDuration)
+                if aEnergy.min() < 0:
+                    i = int(np.argmax(aEnergy < 0))
+                    end = aTime[i + 1] if i + 1 < len(aTime) else self.simTime
+                    raise Exception(f"Improbable energy consumption {aEnergy[i]} between {aTime[i]} and {end} mininum power is {aPower.min()}")
+
         if self._energy < 0:
-            raise Exception(f"Improbable energy consumption  {self._energy} mininum power is {min([time[1] for time in power])}")
-        
-        return self._energy
\ No newline at end of file
+            raise Exception(f"Improbable energy consumption  {self._energy}")
+
+        return self._energy
@@ -0,0 +1,287 @@
+import os
+import csv
+import numpy as np
+from pathlib import Path
+
+try:
+    import pyarrow as pa  # used for the Parquet export when it is available
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# =====================
+# Result Rows
+# =====================
+
+MAX_NODES = 6  # Number of node column groups in the result tables
+NUM_OF_TASKS = 11  # Number of task column groups in the result tables
+
+L_RESULT_COLUMNS = (
+    ["configName", "geoMean", "nodes", "energy", "avgLatency", "throughput", "iteration"]
+    + [f"{name}{i}" for i in range(1, MAX_NODES + 1) for name in ["processor", "schedule", "voltage"]]
+    + [f"{name}{i}" for i in range(1, NUM_OF_TASKS + 1) for name in ["mapTask", "priorityTask"]]
+)
+
+def get_result_row(config):
+    """
+    Flattens the parameters and metrics of an analyzed configuration into one table row.
+
+    Args:
+        config (PlatformConfig): An analyzed configuration.
+
+    Returns:
+        dict: Column name to value, nodes which are not present are left empty.
+    """
+    energy, avgLatency, throughput = config.get_metrics()
+    dRow = {
+        "configName": config.configName,
+        "geoMean": config.get_geo_mean(),
+        "nodes": config.numOfNodes,
+        "energy": energy,
+        "avgLatency": avgLatency,
+        "throughput": throughput,
+        "iteration": config.iteration,
+    }
+    for i in range(1, MAX_NODES + 1):
+        dRow[f"processor{i}"] = config.dProcessors.get(f"Node{i}ProcessorType", "")
+        dRow[f"schedule{i}"] = config.dSchedules.get(f"OSPolicy{i}", "")
+        dRow[f"voltage{i}"] = config.dVoltageScales.get(f"VSF{i}", "")
+    for i in range(1, NUM_OF_TASKS + 1):
+        dRow[f"mapTask{i}"] = config.dMapping.get(f"MapTask{i}To", "")
+        dRow[f"priorityTask{i}"] = config.dPriority.get(f"PriorityTask{i}", "")
+    return dRow
+
+# =====================
+# Output Renderers
+# =====================
+
+class LatexTableRenderer:
+    """
+    Renders rows in the "&;" separated format which is pasted into the LaTeX tables of the report.
+    """
+
+    def write_header(self, f):
+        lHeader = [r"&;", r"\rot\{Geometric Mean\}&;", r"\rot\{Nodes\}&;", r"\rot\{Energy\}&;",
+                   r"\rot\{Average Latency\}&;", r"\rot\{Throughput\}&;", r"\rot\{Iteration\}&;"]
+        lHeader += [r"\multicolumn\{3\}\{|c||\}\{" + f"Node {i}" + r"\}" for i in range(1, MAX_NODES + 1)]
+        lHeader += [r"\multicolumn\{2\}\{|c||\}\{" + f"Task {i}" + r"\}" for i in range(1, NUM_OF_TASKS + 1)]
+        lHeader += ["\\\\\n"]
+        lHeader += ["&;" for i in range(7)]
+        lHeader += [r"\rot\{Processor\}&;" + r"\rot\{Schedule\}&;" + r"\rot\{Voltage [\%]\}&;" for i in range(1, MAX_NODES + 1)]
+        lHeader += [r"\rot\{Node\}&;" + r"\rot\{Priority\}&;" for i in range(1, NUM_OF_TASKS + 1)]
+        lHeader += ["\\\\\n"]
+        f.write("".join(lHeader))
+
+    def write_rows(self, f, lRows):
+        lLines = []
+        for dRow in lRows:
+            lCells = [dRow["geoMean"], dRow["nodes"], dRow["energy"], dRow["avgLatency"], dRow["throughput"], dRow["iteration"]]
+            for i in range(1, dRow["nodes"] + 1):
+                lCells += [dRow[f"processor{i}"], dRow[f"schedule{i}"], dRow[f"voltage{i}"]]
+            if dRow["nodes"] < 7:
+                lCells += ["", "", ""]
+            for i in range(1, NUM_OF_TASKS + 1):
+                lCells += [dRow[f"mapTask{i}"], dRow[f"priorityTask{i}"]]
+            lLines.append("&;" + "".join(f"{cell}&;" for cell in lCells) + "\\\\\n")
+        f.write("".join(lLines))
+
+    def read_row(self, line: str):
+        """
+        Parses a written line back into a row, the configuration name is not part of this format.
+
+        Returns:
+            dict: Column name to value as text, None for a header line.
+        """
+        lCells = line.rstrip("\r\n").removesuffix("\\\\").split("&;")[1:-1]
+        if len(lCells) < 6 or not lCells[5].isdigit():
+            return None
+        dRow = dict(zip(["geoMean", "nodes", "energy", "avgLatency", "throughput", "iteration"], lCells))
+        dRow["configName"] = ""
+        numOfNodes = int(dRow["nodes"])
+        for i in range(1, MAX_NODES + 1):
+            lNode = lCells[6 + 3 * (i - 1):6 + 3 * i] if i <= numOfNodes else ["", "", ""]
+            dRow[f"processor{i}"], dRow[f"schedule{i}"], dRow[f"voltage{i}"] = lNode
+        # The nodes are followed by three empty cells
+        lTasks = lCells[6 + 3 * numOfNodes + 3:]
+        for i in range(1, NUM_OF_TASKS + 1):
+            dRow[f"mapTask{i}"], dRow[f"priorityTask{i}"] = lTasks[2 * (i - 1):2 * i]
+        return dRow
+
+class CsvRenderer:
+    """
+    Renders rows as a plain comma separated file with one named column per field.
+    """
+
+    def write_header(self, f):
+        csv.DictWriter(f, fieldnames=L_RESULT_COLUMNS).writeheader()
+
+    def write_rows(self, f, lRows):
+        csv.DictWriter(f, fieldnames=L_RESULT_COLUMNS).writerows(lRows)
+
+    def read_row(self, line: str):
+        """
+        Parses a written line back into a row.
+
+        Returns:
+            dict: Column name to value as text, None for a header line.
+        """
+        dRow = dict(zip(L_RESULT_COLUMNS, next(csv.reader([line]))))
+        return dRow if dRow.get("iteration", "").isdigit() else None
+
+# =====================
+# Columnar Export
+# =====================
+
+def get_columnar_path(path):
+    """
+    Returns the columnar file of a table, the suffix depends on whether pyarrow is installed.
+
+    Args:
+        path (Path): Destination without suffix.
+    """
+    return Path(path).with_suffix(".parquet" if pa is not None else ".npz")
+
+def load_columnar(path):
+    """
+    Reads a table written by export_columnar.
+
+    Args:
+        path (Path): Destination without suffix, as passed to export_columnar.
+
+    Returns:
+        dict: Column name to list of values, None when the file does not exist.
+    """
+    path = get_columnar_path(path)
+    if not os.path.isfile(path):
+        return None
+    if pa is not None:
+        return pq.read_table(path).to_pydict()
+    with np.load(path) as data:
+        return {name: data[name].tolist() for name in data.files}
+
+def export_columnar(path, dColumns: dict):
+    """
+    Writes a table to a columnar file, Parquet when pyarrow is installed and NumPy's npz otherwise.
+
+    Args:
+        path (Path): Destination without suffix, the suffix is chosen by the format.
+        dColumns (dict): Column name to list of values.
+
+    Returns:
+        Path: The written file.
+    """
+    path = get_columnar_path(path)
+    if pa is not None:
+        pq.write_table(pa.Table.from_pydict(dColumns), path)
+    else:
+        np.savez_compressed(path, **{name: np.asarray(values) for name, values in dColumns.items()})
+    return path
+
+# =====================
+# Result Sink
+# =====================
+
+class ResultSink:
+    """
+    Collects result rows of a search in memory and writes them in bulk.
+
+    A search opens the sink once, adds every analyzed configuration and the rows are flushed
+    to the text file when the buffer is full, on flush() and on close(). Like the text file, a
+    table which already exists is continued, e.g. by a resumed search.
+
+    The same rows are appended to a columnar file next to the text file for fast downstream
+    filtering, so both always hold the whole table. Appending rewrites the columnar file, which
+    is why searches with very large tables turn it off.
+
+    Attributes:
+        file (Path): Text output file.
+        renderer: Renderer which formats the text output, LatexTableRenderer by default.
+        bufferSize (int): Number of rows kept in memory before they are written.
+        columnar (bool): Keep a columnar copy of the table next to the text output.
+    """
+
+    def __init__(self, file, renderer=None, bufferSize: int = 1000, columnar: bool = True):
+        self.file = Path(file)
+        self.renderer = LatexTableRenderer() if renderer is None else renderer
+        self.bufferSize = bufferSize
+        self.columnar = columnar
+        self._lBuffer = []  # Rows which have not been written yet
+        if columnar and not os.path.isfile(self.file) and os.path.isfile(get_columnar_path(self.file.with_suffix(""))):
+            # A new table does not continue the columnar copy of a table which was removed
+            os.remove(get_columnar_path(self.file.with_suffix("")))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, config):
+        """
+        Adds the row of an analyzed configuration.
+
+        Args:
+            config (PlatformConfig): An analyzed configuration.
+        """
+        self._lBuffer.append(get_result_row(config))
+        if len(self._lBuffer) >= self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows to the text file and the columnar file, the header is written when the file is new.
+        """
+        if not self._lBuffer:
+            return
+        os.makedirs(self.file.parent, exist_ok=True)
+        isNew = not os.path.isfile(self.file)
+        with open(self.file, "a", newline='') as f:
+            if isNew:
+                self.renderer.write_header(f)
+            self.renderer.write_rows(f, self._lBuffer)
+        if self.columnar:
+            dColumns = load_columnar(self.file.with_suffix("")) or {name: [] for name in L_RESULT_COLUMNS}
+            for dRow in self._lBuffer:
+                for name in L_RESULT_COLUMNS:
+                    dColumns[name].append(dRow[name])
+            export_columnar(self.file.with_suffix(""), dColumns)
+        self._lBuffer = []
+
+    def read_rows(self):
+        """
+        Reads the rows which were written to the text file.
+
+        Returns:
+            list: Rows as returned by the read_row method of the renderer.
+        """
+        self.flush()
+        if not os.path.isfile(self.file):
+            return []
+        with open(self.file, newline='') as f:
+            return [dRow for line in f if (dRow := self.renderer.read_row(line)) is not None]
+
+    def drop_iterations(self, first: int):
+        """
+        Removes the written rows of iteration first and later, e.g. the rows a search wrote after its last checkpoint.
+
+        Args:
+            first (int): First iteration to remove.
+        """
+        self.flush()
+        if os.path.isfile(self.file):
+            with open(self.file, newline='') as f:
+                lLines = f.readlines()
+            lLines = [line for line in lLines if (dRow := self.renderer.read_row(line)) is None or int(dRow["iteration"]) < first]
+            with open(self.file, "w", newline='') as f:
+                f.writelines(lLines)
+        dColumns = load_columnar(self.file.with_suffix("")) if self.columnar else None
+        if dColumns is not None:
+            lKeep = [i for i, iteration in enumerate(dColumns["iteration"]) if iteration < first]
+            export_columnar(self.file.with_suffix(""), {name: [values[i] for i in lKeep] for name, values in dColumns.items()})
+
+    def close(self):
+        """
+        Flushes the remaining rows.
+        """
+        self.flush()
@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+from constants import RESULT_STORE_FILE, RESULT_STORE_VERSION
+
+# =====================
+# Persistent Result Store
+# =====================
+
+class ResultStore:
+    """
+    SQLite backed store of simulation outcomes, keyed by the canonical key of a PlatformConfig.
+
+    Each record holds the status of the configuration ("ok", "error" or "pending" when the
+    traces have not been analyzed yet), its metrics, a digest of stderr, the wall time
+    of the simulation and the reason when it failed. It allows a search to skip configurations which were handled in a
+    previous run without touching their output directories.
+
+    Attributes:
+        path (Path): Location of the SQLite database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        # SQLite connections must not be shared with forked worker processes
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, "
+                "config_name TEXT, "
+                "output_dir TEXT, "
+                "status TEXT NOT NULL, "
+                "energy REAL, "
+                "avg_latency REAL, "
+                "throughput REAL, "
+                "stderr_digest TEXT, "
+                "wall_time REAL, "
+                "reason TEXT, "
+                "updated REAL)"
+            )
+            # Stores created before failure reasons were recorded lack the column
+            lColumns = [row["name"] for row in self._connection.execute("PRAGMA table_info(results)")]
+            if "reason" not in lColumns:
+                self._connection.execute("ALTER TABLE results ADD COLUMN reason TEXT")
+            # Keys of older stores left the simulated time out when it equaled SIM_TIME at that moment,
+            # that time is unknown now, so those records are dropped instead of reused for another length
+            if self._connection.execute("PRAGMA user_version").fetchone()[0] < RESULT_STORE_VERSION:
+                self._connection.execute("DELETE FROM results WHERE key NOT LIKE '%|simTime=%'")
+                self._connection.execute(f"PRAGMA user_version={RESULT_STORE_VERSION}")
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key: str):
+        """
+        Looks up the record of a configuration.
+
+        Args:
+            key (str): Canonical key of the configuration.
+
+        Returns:
+            sqlite3.Row: The stored record or None if the configuration is unknown.
+        """
+        return self._connect().execute("SELECT * FROM results WHERE key = ?", (key,)).fetchone()
+
+    def contains(self, key: str):
+        return self.get(key) is not None
+
+    def record(self, config, status: str, energy: float = None, avgLatency: float = None, throughput: float = None,
+               stderrDigest: str = None, wallTime: float = None, reason: str = None):
+        """
+        Inserts or updates the record of a configuration.
+
+        Values which are not given keep what was stored before, so the metrics of an
+        analysis can be added to the record made when the simulation finished. The output
+        directory of the first record is kept, relabeled copies of a configuration share its traces.
+
+        Args:
+            config (PlatformConfig): The configuration to record.
+            status (str): "ok", "error" or "pending".
+            energy (float): Total energy consumption.
+            avgLatency (float): Average latency.
+            throughput (float): Throughput.
+            stderrDigest (str): Digest of the stderr output of Rotalumis.
+            wallTime (float): Wall clock duration of the simulation in seconds.
+            reason (str): Why the simulation failed, e.g. a timeout or divergence.
+        """
+        connection = self._connect()
+        connection.execute(
+            "INSERT INTO results (key, config_name, output_dir, status, energy, avg_latency, throughput, stderr_digest, wall_time, reason, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "config_name = excluded.config_name, "
+            "output_dir = COALESCE(output_dir, excluded.output_dir), "
+            "status = excluded.status, "
+            "energy = COALESCE(excluded.energy, energy), "
+            "avg_latency = COALESCE(excluded.avg_latency, avg_latency), "
+            "throughput = COALESCE(excluded.throughput, throughput), "
+            "stderr_digest = COALESCE(excluded.stderr_digest, stderr_digest), "
+            "wall_time = COALESCE(excluded.wall_time, wall_time), "
+            "reason = CASE WHEN excluded.status = 'error' THEN COALESCE(excluded.reason, reason) END, "
+            "updated = excluded.updated",
+            (config.get_key(), config.configName, str(config.outputDir), status, energy, avgLatency, throughput,
+             stderrDigest, wallTime, reason, time.time())
+        )
+        connection.commit()
+
+    def forget(self, key: str):
+        """
+        Removes the record of a configuration, e.g. before forcing a new simulation.
+        """
+        connection = self._connect()
+        connection.execute("DELETE FROM results WHERE key = ?", (key,))
+        connection.commit()
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+
+_resultStore = None
+
+def get_result_store():
+    """
+    Returns the result store shared by the simulation and search functions of this run.
+    """
+    global _resultStore
+    if _resultStore is None:
+        _resultStore = ResultStore(RESULT_STORE_FILE)
+    return _resultStore
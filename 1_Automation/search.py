@@ -0,0 +1,262 @@
+import os
+import math
+from result_sink import ResultSink
+from result_store import get_result_store
+from surrogate import estimate_metrics
+from pareto import ParetoFront, get_objectives, select_by_policy
+from simulations import analyze_results, parallel_sims, contains_error, get_executor
+from constants import OUTPUT_DIR_BASE, SIM_TIME, SIM_STOP_MODE, FIDELITY_RUNGS, FIDELITY_REDUCTION, WINNER_POLICY
+
+# =====================
+# Search Strategies
+# =====================
+
+class SearchStrategy:
+    """
+    Interface of a search: ask for configurations, evaluate them, tell the results.
+
+    Strategies only decide which configurations to try, the BatchEvaluator runs them.
+    """
+    def ask(self, numOfConfigs: int = None):
+        """
+        Proposes the next batch of configurations.
+
+        Args:
+            numOfConfigs (int): Preferred size of the batch, strategies with a natural batch
+                such as an iteration of the tree search may ignore it.
+
+        Returns:
+            list: PlatformConfig objects, an empty list when the search is finished.
+        """
+        raise NotImplementedError
+
+    def tell(self, lResults: list):
+        """
+        Receives the results of the last batch from ask.
+
+        Args:
+            lResults (list): (config, metrics) in the order of the batch, metrics is
+                (energy, average latency, throughput) or None when the simulation failed.
+        """
+        pass
+
+    def is_done(self):
+        return False
+
+# =====================
+# Evaluation
+# =====================
+
+class BatchEvaluator:
+    """
+    Simulates, analyzes and records batches of configurations for a search strategy.
+
+    Results are cached by configuration key, so configurations which are asked again, e.g. the
+    winners of the previous iteration, are neither simulated nor analyzed nor written twice.
+    Every valid result is added to the result table and the Pareto front of the search, which
+    strategies can select their winners from.
+
+    With more than one fidelity rung a batch is evaluated by successive halving: all new configurations
+    are first simulated for a fraction of SIM_TIME, only the best part of them is simulated longer,
+    and only the last survivors run for the full SIM_TIME. The others are reported as failed.
+    """
+    def __init__(self, testName: str, dryRun: bool = False, executor=None, columnar: bool = True, reset: bool = True,
+                 cache: bool = True, fidelityRungs: int = FIDELITY_RUNGS, fidelityReduction: int = FIDELITY_REDUCTION,
+                 policy: str = WINNER_POLICY, estimate: bool = False):
+        """
+        Args:
+            testName (str): File name of the result table in OUTPUT_DIR_BASE.
+            dryRun (bool): Do not simulate, every result is None unless estimate is set.
+            executor (SimulationExecutor): Worker pool, the shared executor by default.
+            columnar (bool): Also keep the table in the columnar file, see ResultSink.
+            reset (bool): Remove the table of an earlier run, False to continue it.
+            cache (bool): Remember the results of earlier batches, searches which never ask for
+                a configuration twice can turn it off to keep memory constant.
+            fidelityRungs (int): Number of simulation lengths, the last one is SIM_TIME. Confidence mode
+                caps every length at SIM_CONFIDENCE_TIME, so it only allows a single rung.
+            fidelityReduction (int): Every rung keeps one in this many candidates and simulates them this many times longer.
+            policy (str): "geomean" or "pareto", how the candidates of a rung are ranked.
+            estimate (bool): Dry runs take the analytic estimate of surrogate.py as result, for
+                strategies which need metrics to continue.
+        """
+        if SIM_STOP_MODE == "confidence" and fidelityRungs > 1:
+            # Every rung would be the same capped simulation, see PlatformConfig
+            message = f"Successive halving needs SIM_STOP_MODE \"time\", got {fidelityRungs} fidelity rungs in confidence mode"
+            print(message)
+            raise Exception(message)
+        self.file = OUTPUT_DIR_BASE.joinpath(testName)
+        self.dryRun = dryRun
+        self.executor = None
+        self.sink = None
+        if not dryRun:
+            self.executor = executor if executor is not None else get_executor()
+            if reset and os.path.isfile(self.file):
+                os.remove(self.file)
+            self.sink = ResultSink(self.file, columnar=columnar)
+        self.front = ParetoFront()  # Trade-off between nodes, energy, latency and throughput of every result
+        self.cache = cache
+        self._dResults = {}  # Key -> metrics or None, of every configuration evaluated by this search
+        self.numOfConfigs = 0  # Configurations passed to evaluate
+        self.numOfSims = 0  # Simulations which were run
+        self.numOfErrors = 0  # Configurations which ended with an error
+        self.numOfPruned = 0  # Configurations stopped at a shorter simulation time
+        self.simulatedTime = 0.0  # Total simulated seconds of the simulations which were run
+        self.fidelityRungs = fidelityRungs
+        self.fidelityReduction = fidelityReduction
+        self.policy = policy
+        self.estimate = estimate
+
+    def get_rung_sim_time(self, rung: int):
+        return f"{float(SIM_TIME) / self.fidelityReduction ** (self.fidelityRungs - 1 - rung):g}"
+
+    def get_survivors(self, lCandidates: list, lShortConfigs: list, numOfSurvivors: int):
+        """
+        Ranks the candidates on the metrics of their short simulation.
+
+        Returns:
+            list: The best numOfSurvivors candidates.
+        """
+        lPoints = [get_objectives(config.numOfNodes, *config.get_metrics()) for config in lShortConfigs]
+        lGeoMeans = [config.get_geo_mean() for config in lShortConfigs]
+        return select_by_policy(lCandidates, lGeoMeans, lPoints, numOfSurvivors, self.policy)
+
+    def prune(self, lConfigs: list):
+        """
+        Successive halving over the simulation time, configurations with a full length result are kept as they are.
+
+        Returns:
+            list: The configurations which should be simulated for the full SIM_TIME.
+        """
+        store = get_result_store()
+        lKeep = [config for config in lConfigs if store.get(config.get_key()) is not None]
+        lCandidates = [config for config in lConfigs if store.get(config.get_key()) is None]
+
+        for rung in range(self.fidelityRungs - 1):
+            if len(lCandidates) <= 1:
+                break
+            simTime = self.get_rung_sim_time(rung)
+            lShortConfigs = [config.get_copy_with_sim_time(simTime) for config in lCandidates]
+            runSims = parallel_sims(lShortConfigs, analyze=True, executor=self.executor)
+            self.numOfSims += len(runSims)
+            self.simulatedTime += sum(float(config.simTime) for config in runSims)
+
+            lValid = []
+            for candidate, config in zip(lCandidates, lShortConfigs):
+                if not contains_error(config) and all(analyze_results(config)):
+                    lValid.append((candidate, config))
+            numOfSurvivors = math.ceil(len(lCandidates) / self.fidelityReduction)
+            lCandidates = self.get_survivors([pair[0] for pair in lValid], [pair[1] for pair in lValid], numOfSurvivors)
+            print(f"	Rung {rung} simulated {len(lShortConfigs)} configs for {simTime}s, {len(lCandidates)} continue")
+
+        return lKeep + lCandidates
+
+    def evaluate(self, lConfigs: list):
+        """
+        Evaluates a batch as one parallel_sims call.
+
+        Returns:
+            list: (config, metrics) for every configuration, see SearchStrategy.tell.
+        """
+        if self.dryRun and not self.estimate:
+            return [(config, None) for config in lConfigs]
+
+        if not self.cache:
+            self._dResults = {}
+        lNew = []
+        sNewKeys = set()
+        for config in lConfigs:
+            key = config.get_key()
+            if key not in self._dResults and key not in sNewKeys:
+                sNewKeys.add(key)
+                lNew.append(config)
+
+        if self.dryRun:
+            for config in lNew:
+                self._dResults[config.get_key()] = estimate_metrics(config)
+                config.set_metrics(*self._dResults[config.get_key()])
+            self.front.add_configs(lNew)
+            return self.get_results(lConfigs)
+
+        lSimulate = lNew
+        if self.fidelityRungs > 1:
+            lSimulate = self.prune(lNew)
+        sSimulate = {id(config) for config in lSimulate}
+        runSims = parallel_sims(lSimulate, analyze=True, executor=self.executor)
+
+        numOfErrors = 0
+        lValid = []
+        for config in lNew:
+            metrics = None
+            if id(config) not in sSimulate:
+                self.numOfPruned += 1
+            elif contains_error(config):
+                numOfErrors += 1
+            else:
+                energy, avgLatency, throughput = analyze_results(config)
+                if energy and avgLatency and throughput:
+                    metrics = (energy, avgLatency, throughput)
+                    self.sink.add(config)
+                    lValid.append(config)
+            self._dResults[config.get_key()] = metrics
+        self.sink.flush()
+        self.front.add_configs(lValid)
+        lResults = self.get_results(lConfigs)
+
+        self.numOfConfigs += len(lConfigs)
+        self.numOfSims += len(runSims)
+        self.simulatedTime += sum(float(config.simTime) for config in runSims)
+        self.numOfErrors += numOfErrors
+        print(
+            f"Out of {len(lConfigs)} configs\n\t{len(lConfigs) - len(lNew)} were duplicates or evaluated earlier in this search\n\t{len(lNew) - len(lSimulate)} were stopped at a shorter simulation time\n\t{len(runSims)} ran\n\t{len(lSimulate) - len(runSims)} were already done\n\t{numOfErrors} ended with an error\n\t{len(lValid)} were successful\n"
+        )
+        return lResults
+
+    def add_known(self, lConfigs: list):
+        """
+        Caches configurations whose rows an earlier run already wrote, e.g. by a resumed search,
+        so they are not written again when they are asked for. Their results join the Pareto front.
+        """
+        lValid = []
+        for config in lConfigs:
+            energy, avgLatency, throughput = analyze_results(config)
+            self._dResults[config.get_key()] = (energy, avgLatency, throughput) if energy and avgLatency and throughput else None
+            if self._dResults[config.get_key()] is not None:
+                lValid.append(config)
+        self.front.add_configs(lValid)
+
+    def get_results(self, lConfigs: list):
+        """
+        Looks up the metrics of an evaluated batch, configurations which share a key share the metrics.
+
+        Returns:
+            list: (config, metrics) for every configuration, see SearchStrategy.tell.
+        """
+        lResults = []
+        for config in lConfigs:
+            metrics = self._dResults[config.get_key()]
+            if metrics is not None and not config.has_metrics():
+                config.set_metrics(*metrics)
+            lResults.append((config, metrics))
+        return lResults
+
+    def close(self):
+        """
+        Writes the remaining rows and the Pareto front next to the result table.
+        """
+        if self.sink is not None:
+            print(f"{self.numOfSims} simulations ran for {self.simulatedTime:g} simulated seconds in total")
+            self.sink.close()
+            if len(self.front):
+                self.front.write(self.file.with_name(self.file.name.replace(".csv", "_pareto_front.csv")))
+
+def run_search(strategy: SearchStrategy, evaluator: BatchEvaluator, batchSize: int = None):
+    """
+    Alternates ask and tell until the strategy is done or has nothing left to ask.
+    """
+    while not strategy.is_done():
+        lConfigs = strategy.ask(batchSize)
+        if not lConfigs:
+            break
+        strategy.tell(evaluator.evaluate(lConfigs))
+    evaluator.close()
+    return strategy
@@ -1,210 +1,556 @@
 import os
-import shutil
+import time
+import atexit
+import asyncio
+import hashlib
 from pathlib import Path
-from timing import TaskTiming
+from functools import partial
+from dataclasses import dataclass
 from tqdm import tqdm
+from queue import Queue
+from threading import Thread
 from multiprocessing import Pool
-import xml.etree.ElementTree as et
+from traces import parse_battery_trace, parse_processor_trace, parse_application_log, load_trace_archive, TRACE_ARCHIVE
 from Rotalumis import rotalumisrunner  # External tool for simulation execution
-from platform_config import PlatformConfig
-from constants import MODEL_DIR, MODEL_LIB_DIRS
+from platform_config import PlatformConfig, update_manifest
+from result_store import get_result_store
+from workspace import Workspace
+from constants import MODEL_LIB_DIRS, FLAT_OUTPUT_DIRS, SIM_BACKEND, SIM_TIMEOUT, SIM_MEMORY_LIMIT, SIM_STOP_MODE
 
 
+# =====================
+# Simulation Result Dataclass
+# =====================
+
+@dataclass
+class SimulationResult:
+    """
+    Compact outcome of a single simulation, small enough to be sent back from a worker process.
+    """
+    outputDir: Path  # Output directory of the simulated configuration
+    returncode: int = -1  # Exit code of the Rotalumis process
+    error: str = ""  # Last error reported by Rotalumis
+    status: str = "pending"  # "ok", "error" or "pending" when the traces have not been analyzed
+    energy: float = False  # Total energy consumption
+    avgLatency: float = False  # Average iteration latency
+    throughput: float = False  # System throughput
+    stderrDigest: str = None  # SHA-1 digest of the stderr output
+    wallTime: float = None  # Wall clock duration of the simulation in seconds
+    reason: str = None  # Why the simulation failed, None when it did not
+    dEstimates: dict = None  # Interval estimates of the application monitors, see PlatformConfig.dEstimates
+
 # =====================
 # Simulation Methods
 # =====================
 
-def contains_error(config):
+STDERR_TAIL_BYTES = 65536  # Bytes read from the end of stderr.txt to find the reason of a failure
+
+def stderr_contains_error(outputDir):
     
-    dir = config.outputDir.joinpath("stderr.txt")
+    dir = outputDir.joinpath("stderr.txt")
     if os.path.isfile(dir):
-        text = dir.read_text()
-        return len(text) > 2
+        return os.path.getsize(dir) > 2
     else:
         return False
 
-def run_simulation(selectedConfig: PlatformConfig):
+def read_stderr_tail(outputDir):
     """ 
-    Runs the simulation for a given platform configuration.
+    Reads the end of stderr.txt without loading the whole file.
+
+    Returns:
+        str: The last STDERR_TAIL_BYTES of the error output, empty when there is none.
+    """
+    dir = outputDir.joinpath("stderr.txt")
+    if not os.path.isfile(dir):
+        return ""
+    with open(dir, "rb") as f:
+        f.seek(max(0, os.path.getsize(dir) - STDERR_TAIL_BYTES))
+        return f.read().decode("utf-8", "replace")
+
+def contains_error(config):
+    # The result store knows the outcome of every config handled in an earlier run
+    record = get_result_store().get(config.get_key())
+    if record is not None:
+        return record["status"] == "error"
+    return stderr_contains_error(config.outputDir)
+
+def get_failure_reason(error: str):
+    """ 
+    Extracts the reason of a failed simulation from its error output.
+
+    Args:
+        error (str): Error output of Rotalumis.
+
+    Returns:
+        str: The last reported error, the last line of the output when no error was tagged.
+    """
+    lLines = [line.strip() for line in error.splitlines() if line.strip()]
+    lErrors = [line for line in lLines if line.startswith("[ERROR")]
+    if lErrors:
+        return lErrors[-1].removeprefix("[ERROR").lstrip(" ]")
+    return lLines[-1] if lLines else None
+
+def get_stderr_digest(outputDir):
+    dir = outputDir.joinpath("stderr.txt")
+    if os.path.isfile(dir):
+        digest = hashlib.sha1()
+        with open(dir, "rb") as f:
+            for chunk in iter(lambda: f.read(STDERR_TAIL_BYTES), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    return None
+
+def prepare_simulation(selectedConfig: PlatformConfig, model: str = None, workspace: Workspace = None):
+    """ 
+    Creates the working directory of a configuration and writes its model.
     Args:
         selectedConfig (PlatformConfig): The platform configuration to simulate.
+        model (str): Model text, generated from the template by default.
+        workspace (Workspace): Directory to run in, the output directory of the configuration by default.
 
     Returns:
-        tuple: (Simulation result, selectedConfig, output directory)
+        str: Absolute path to the model file
     """
-    model = selectedConfig.get_model()  # Generate the model from the template
+    if model is None:
+        model = selectedConfig.get_model()  # Generate the model from the template
     
-    # Ensure the output directory exists
-    if not os.path.isdir(selectedConfig.outputDir):
-        os.makedirs(selectedConfig.outputDir)
-        
-        # Copy processor configuration files into the output directory
-        for proc in ["ARMv8.txt", "MIPS.txt", "Adreno.txt"]:
-            shutil.copy(MODEL_DIR.joinpath("simulator", proc),
-                selectedConfig.outputDir.joinpath(proc)
-            )
+    # Ensure the working directory exists and links the processor tables
+    if workspace is None:
+        workspace = Workspace(selectedConfig.outputDir, scratchDir=None)
+    workspace.create()
     
-    # Write the generated model to a temporary file
-    temp_filename = selectedConfig.outputDir.joinpath("model.poosl")
-    with open(temp_filename, "w") as output:
-        output.write(model)
+    # Write the generated model to a temporary file, unless an identical model is already present
+    temp_filename = workspace.workDir.joinpath("model.poosl")
+    modelBytes = model.encode()
+    modelDigest = hashlib.sha1(modelBytes).digest()
+    if not os.path.isfile(temp_filename) or hashlib.sha1(temp_filename.read_bytes()).digest() != modelDigest:
+        with open(temp_filename, "wb") as output:
+            output.write(modelBytes)
     
-    temp_path = os.path.abspath(temp_filename)  # Get the absolute path to the model file
+    return os.path.abspath(temp_filename)  # Get the absolute path to the model file
+
+def finish_simulation(selectedConfig: PlatformConfig, returncode: int, error: str, wallTime: float, analyze: bool = False,
+                      workspace: Workspace = None):
+    """ 
+    Collects the outcome of a finished Rotalumis run.
+    Args:
+        selectedConfig (PlatformConfig): The simulated platform configuration.
+        returncode (int): Exit code of Rotalumis.
+        error (str): Error output of Rotalumis.
+        wallTime (float): Wall clock duration of the simulation in seconds.
+        analyze (bool): Parse and reduce the traces.
+        workspace (Workspace): Directory the simulation ran in, it is closed afterwards.
+
+    Returns:
+        SimulationResult: Exit code, error and, when analyzed, the metrics of the simulation
+    """
+    workDir = selectedConfig.outputDir if workspace is None else workspace.workDir
+    result = SimulationResult(outputDir=selectedConfig.outputDir, returncode=returncode, error=error,
+                              stderrDigest=get_stderr_digest(workDir),
+                              wallTime=wallTime)
+
+    try:
+        if returncode != 0 or stderr_contains_error(workDir):
+            result.status = "error"
+            result.reason = get_failure_reason(error if error else read_stderr_tail(workDir))
+        elif analyze:
+            result.energy, result.avgLatency, result.throughput = reduce_traces(selectedConfig, workDir)
+            result.dEstimates = selectedConfig.dEstimates
+            result.status = "ok"
+    finally:
+        if workspace is not None:
+            # The traces of an analyzed simulation are only kept when the retention policy asks for it
+            workspace.close(analyzed=analyze and result.status == "ok")
+
+    return result
+
+def run_simulation(selectedConfig: PlatformConfig, analyze: bool = False, model: str = None):
+    """ 
+    Runs the simulation for a given platform configuration.
+    Args:
+        selectedConfig (PlatformConfig): The platform configuration to simulate.
+        analyze (bool): Parse and reduce the traces right after the simulator exits,
+            so only the metrics have to travel back to the parent process.
+        model (str): Model text, generated from the template by default.
+
+    Returns:
+        SimulationResult: Exit code, error and, when analyzed, the metrics of the simulation
+    """
+    workspace = Workspace(selectedConfig.outputDir)
+    temp_path = prepare_simulation(selectedConfig, model, workspace)
     
     # Execute the simulation using Rotalumis
-    return rotalumisrunner.runrotalumis(temp_path, selectedConfig.outputDir, MODEL_LIB_DIRS), selectedConfig, selectedConfig.outputDir
+    startTime = time.perf_counter()
+    returncode, error = rotalumisrunner.runrotalumis(temp_path, workspace.workDir, MODEL_LIB_DIRS,
+        timeout=SIM_TIMEOUT, memory_limit=SIM_MEMORY_LIMIT)
+    return finish_simulation(selectedConfig, returncode, error, time.perf_counter() - startTime, analyze, workspace)
+
+async def run_simulations_async(lConfigs: list, analyze: bool = False, maxConcurrent: int = None):
+    """ 
+    Runs many simulations from a single event loop instead of one worker process per simulation.
+    The analysis of finished simulations is moved to a thread so new simulations keep being launched.
+    Args:
+        lConfigs (list): The platform configurations to simulate.
+        analyze (bool): Parse and reduce the traces right after each simulator exits.
+        maxConcurrent (int): Maximum number of concurrent simulations, the number of cores by default.
+
+    Yields:
+        tuple: (PlatformConfig, SimulationResult) as the simulations complete
+    """
+    lWorkspaces = [Workspace(config.outputDir) for config in lConfigs]
+    lJobs = [(prepare_simulation(config, workspace=workspace), workspace.workDir, MODEL_LIB_DIRS)
+             for config, workspace in zip(lConfigs, lWorkspaces)]
+    
+    async for index, (returncode, error), wallTime in rotalumisrunner.runrotalumis_batch(
+            lJobs, maxConcurrent, timeout=SIM_TIMEOUT, memory_limit=SIM_MEMORY_LIMIT):
+        config = lConfigs[index]
+        yield config, await asyncio.to_thread(finish_simulation, config, returncode, error, wallTime, analyze, lWorkspaces[index])
+
+def apply_result(config: PlatformConfig, result: SimulationResult):
+    """
+    Transfers the metrics computed by a worker onto the configuration of the parent process
+    and records the outcome in the result store.
+
+    Args:
+        config (PlatformConfig): The configuration which was simulated.
+        result (SimulationResult): The result returned by run_simulation.
+    """
+    if result.status == "ok":
+        config.set_metrics(result.energy, result.avgLatency, result.throughput)
+        if result.dEstimates:
+            config.dEstimates = result.dEstimates
+        get_result_store().record(config, result.status, result.energy, result.avgLatency, result.throughput,
+                                  result.stderrDigest, result.wallTime)
+    else:
+        get_result_store().record(config, result.status, stderrDigest=result.stderrDigest, wallTime=result.wallTime,
+                                  reason=result.reason)
+
+def apply_record(config: PlatformConfig, record):
+    """
+    Transfers the metrics of a result store record onto the configuration.
+
+    Args:
+        config (PlatformConfig): The configuration which was simulated in an earlier run.
+        record (sqlite3.Row): The stored record of the configuration.
+    """
+    if record["status"] == "ok" and record["energy"] is not None:
+        config.set_metrics(record["energy"], record["avg_latency"], record["throughput"])
+
+def get_failure_message(config: PlatformConfig, result: SimulationResult):
+    return (
+        f"Model with params {config} returned {result.returncode} and did not terminate to completion.\n"
+        f"Check the output in {Path(result.outputDir).absolute()}\nLast error was:\n{result.error}"
+    )
+
+# =====================
+# Simulation Executor
+# =====================
 
-def single_sim(config: PlatformConfig, force:bool = False):
+class SimulationExecutor:
+    """ 
+    Keeps one pool of worker processes alive for the whole run, so consecutive calls of
+    single_sim and parallel_sims do not pay for forking and tearing down a new pool.
+    
+    Attributes:
+        processes (int): Number of worker processes, the number of cores by default.
+        maxTasksPerChild (int): Simulations a worker runs before it is replaced, None keeps workers forever.
+    """
+    
+    def __init__(self, processes: int = None, maxTasksPerChild: int = None):
+        self.processes = processes
+        self.maxTasksPerChild = maxTasksPerChild
+        self._pool = None
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+        
+    def get_pool(self):
+        """ 
+        Returns the worker pool, it is started on first use.
+        """
+        if self._pool is None:
+            self._pool = Pool(self.processes, maxtasksperchild=self.maxTasksPerChild)
+        return self._pool
+    
+    def imap_unordered(self, lSims: list, analyze: bool = False):
+        """ 
+        Runs the simulations on the worker pool.
+
+        Yields:
+            tuple: (PlatformConfig, SimulationResult) as the simulations complete
+        """
+        # Results come back unordered, map them back onto the configs of this process
+        dSims = {config.outputDir: config for config in lSims}
+        
+        for result in self.get_pool().imap_unordered(partial(run_simulation, analyze=analyze), lSims):
+            yield dSims[result.outputDir], result
+            
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+_executor = None
+
+def get_executor():
+    """ 
+    Returns the simulation executor shared by the simulation and search functions of this run.
+    """
+    global _executor
+    if _executor is None:
+        _executor = SimulationExecutor()
+        atexit.register(_executor.close)
+    return _executor
+
+def set_executor(executor):
+    """ 
+    Replaces the shared simulation executor, e.g. by a DistributedExecutor which runs the simulations on other hosts.
+    The replaced executor is closed.
+    """
+    global _executor
+    if _executor is not executor:
+        if _executor is not None:
+            _executor.close()
+        atexit.register(executor.close)
+    _executor = executor
+
+def single_sim(config: PlatformConfig, force:bool = False, analyze: bool = False, executor: SimulationExecutor = None):
     """ 
     Runs a single simulation instance.
 
-    Uses multiprocessing to execute the simulation and handles errors.
+    Uses a worker of the simulation executor to execute the simulation and handles errors.
 
     Args:
         config (PlatformConfig): The configuration to simulate.
+        analyze (bool): Analyze the traces inside the worker process.
+        executor (SimulationExecutor): Executor to run on, the shared executor by default.
     """
+    executor = get_executor() if executor is None else executor
+
+    # Configs known to the result store were handled in an earlier run
+    record = get_result_store().get(config.get_key())
+    if record is not None and not force:
+        apply_record(config, record)
+
     # Check if output files already exists, if they do skip the simulation
-    if not contains_error(config):
+    elif not contains_error(config):
         if force or not os.path.isdir(config.outputDir) and not all(
             [os.path.isfile(config.outputDir.joinpath("BatteryTrace.xml"))] + 
             [os.path.isfile(config.outputDir.joinpath(f"ProcessorTraceNode{i}.xml")) for i in range(1, config.numOfNodes + 1)]
             ):
-            with Pool() as pool:
-                for (errcode, error), p, dir in tqdm(
-                    pool.imap_unordered(run_simulation, [config]),  # Run the simulation in parallel
-                    total=1,
-                    desc="Running Simulation",
-                ):
-                    if errcode != 0:
-                        # Handle errors if the simulation did not complete successfully
-                        message = (
-                            f"Model with params {p} returned {errcode} and did not terminate to completion.\n"
-                            f"Check the output in {Path(dir).absolute()}\nLast error was:\n{error}"
-                        )
-                        print(message)
-                        raise Exception(message)
+            if FLAT_OUTPUT_DIRS:
+                update_manifest([config])
+            for config, result in tqdm(
+                executor.imap_unordered([config], analyze),  # Run the simulation on a worker
+                total=1,
+                desc="Running Simulation",
+            ):
+                apply_result(config, result)
+                if result.returncode != 0:
+                    # Handle errors if the simulation did not complete successfully
+                    message = get_failure_message(config, result)
+                    print(message)
+                    raise Exception(message)
 
     print("Experiment finished")
 
-def parallel_sims(lConfigs: list, force:bool = False):
+def parallel_sims(lConfigs: list, force:bool = False, analyze: bool = False, backend: str = SIM_BACKEND,
+                  executor: SimulationExecutor = None):
     """ 
     Runs multiple simulations in parallel.
 
     Args:
         lConfigs (list): A list of PlatformConfig objects to simulate.
+        analyze (bool): Analyze the traces inside the worker processes, the metrics are
+            stored on the configurations so later calls to analyze_results return immediately.
+        backend (str): "pool" to run every simulation in a worker process or "async" to launch
+            the simulators from a single event loop, which avoids the overhead of a process per simulation.
+        executor (SimulationExecutor): Executor of the "pool" backend, the shared executor by default.
     """
+    executor = get_executor() if executor is None else executor
     
+    store = get_result_store()
     lSims = []
+    dEquivalents = {}  # Canonical key -> configs which are only relabeled copies of the simulated one
     for config in lConfigs:
-        if force or not os.path.isdir(config.outputDir):
+        # Configs known to the result store were handled in an earlier run
+        record = store.get(config.get_key())
+        if record is not None and not force:
+            apply_record(config, record)
+        elif config.get_key() in dEquivalents:
+            dEquivalents[config.get_key()].append(config)
+        elif force or not os.path.isdir(config.outputDir):
             # print(f"Checking file {config.outputDir.joinpath("stderr.txt")}")
             if not contains_error(config):
+                dEquivalents[config.get_key()] = []
                 # print(f"\tAdded")
                 lSims.append(config)
             # else:
             #     print(f"\tSkipped")
                 
-        
-    with Pool() as pool:
-        for (errcode, error), p, dir in tqdm(
-            pool.imap_unordered(run_simulation, lSims),
-            total=len(lSims),
-            desc="Running Simulations",
-        ):
-            if errcode != 0:
-                # Handle errors if any of the simulations fail
-                message = (
-                    f"Model with params {p} returned {errcode} and did not terminate to completion.\n"
-                    f"Check the output in {Path(dir).absolute()}\nLast error was:\n{error}"
-                )
-                # print(message)
-                # if not '[ERROR  ] An exception occurred during run.\n[ERROR  ] Latency is diverging. Throughput constraint is not met.\n':
-                #     raise Exception(message)
+    if FLAT_OUTPUT_DIRS:
+        update_manifest(lSims)
+                
+    if backend == "async":
+        lResults = collect_async_results(lSims, analyze)
+    elif backend == "pool":
+        lResults = executor.imap_unordered(lSims, analyze)
+    else:
+        message = f"Unknown simulation backend {backend}"
+        print(message)
+        raise Exception(message)
+    
+    for config, result in tqdm(lResults, total=len(lSims), desc="Running Simulations"):
+        if result.returncode != 0:
+            # Handle errors if any of the simulations fail
+            message = get_failure_message(config, result)
+            # print(message)
+            # if not '[ERROR  ] An exception occurred during run.\n[ERROR  ] Latency is diverging. Throughput constraint is not met.\n':
+            #     raise Exception(message)
+        apply_result(config, result)
+        for equivalent in dEquivalents[config.get_key()]:
+            if result.status == "ok":
+                equivalent.set_metrics(result.energy, result.avgLatency, result.throughput)
 
     print("Experiment finished")
     return lSims
 
+def collect_async_results(lSims: list, analyze: bool = False):
+    """ 
+    Runs the simulations from an event loop in a background thread and hands the results over as they complete.
+
+    Yields:
+        tuple: (PlatformConfig, SimulationResult) as the simulations complete
+    """
+    queue = Queue()
+    lErrors = []
+    
+    async def produce():
+        async for item in run_simulations_async(lSims, analyze):
+            queue.put(item)
+    
+    def run_loop():
+        try:
+            asyncio.run(produce())
+        except Exception as e:
+            lErrors.append(e)
+        finally:
+            queue.put(None)  # Signals that no more results follow
+    
+    thread = Thread(target=run_loop, daemon=True)
+    thread.start()
+    while (item := queue.get()) is not None:
+        yield item
+    thread.join()
+    if lErrors:
+        raise lErrors[0]
+
 def analyze_results(config: PlatformConfig):
     """ 
-    Analyzes simulation results by parsing XML output files.
+    Analyzes simulation results, from the result store when possible and otherwise by streaming the XML output files.
 
     Args:
         config (PlatformConfig): The configuration whose results should be analyzed.
 
     Returns:
-        tuple: (power usage data, task execution trace data)
+        tuple: (energy, average latency, throughput)
     """
     
-    if contains_error(config):
+    # The traces were already reduced, e.g. inside a simulation worker
+    if config.has_metrics():
+        return config.get_metrics()
+    
+    # Consult the result store before touching the output directory
+    store = get_result_store()
+    record = store.get(config.get_key())
+    outputDir = config.outputDir
+    if record is not None:
+        apply_record(config, record)
+        if config.has_metrics():
+            if SIM_STOP_MODE == "confidence":
+                read_application_estimates(config, Path(record["output_dir"]))
+            return config.get_metrics()
+        elif record["status"] == "error":
+            return False, False, False
+        elif not os.path.isdir(outputDir):
+            # An equivalent config with other node numbers was simulated in its own directory
+            outputDir = Path(record["output_dir"])
+    
+    if stderr_contains_error(outputDir):
         # print(f"Config {config.configName} has errors, no analysis is done")
+        store.record(config, "error", stderrDigest=get_stderr_digest(outputDir),
+                     reason=get_failure_reason(read_stderr_tail(outputDir)))
         return False, False, False
     else :
-        # Parse power usage data from the simulation output
-        try:
-            for power in et.parse(config.outputDir.joinpath("BatteryTrace.xml")).getroot():
-                config._measPower.update_ltPower(power.attrib["difference"], power.attrib["time"])
-        except:
-            print(f"Measurmenet {config.configName} is fucked")
-            raise Exception(f"Measurmenet {config.configName} is fucked")
-        
-        # Parse execution trace data for each node in the system
-        lTaskExecutionData = {
-            f"Node{i}": et.parse(config.outputDir.joinpath(f"ProcessorTraceNode{i}.xml")) 
-            for i in range(1, config.numOfNodes + 1)
-        }
-        
-        for node in lTaskExecutionData.values():
-            lCurrentTasks = []
-            lInterruptTime = []
-            for child in node.getroot():
-                time = float(child.attrib['time'])
-                name = child.attrib['task']
-                if 'start' in child.tag:
-                    iteration = int(child.attrib['iteration'])
-                    lTasks = list(filter(lambda x: (x.name == name and x.iteration == iteration), lCurrentTasks))
-                    
-                    # If the task was interrupted  
-                    if len(lTasks) == 1:
-                        # Remove the last interrupt time as that task has stopped
-                        lTasks[0].down += time - lInterruptTime.pop(-1)
-                        
-                    # Mutliple tasks with the same name and iteration are present, this shouldnt happen
-                    elif len(lTasks) > 1:
-                        # Handle errors if any of the simulations fail
-                        message = (f"Multiple tasks with the same iteration and name have been found")
-                        print(message)
-                        raise Exception(message)
-                    
-                    # A new task has started
-                    else:
-                        lCurrentTasks.append(TaskTiming(name=name, start=time, iteration=iteration))
-                        
-                        # The new task has interrupted another task
-                        if len(lCurrentTasks) > 1:
-                            # Add the start time to the end of the interrupt time, this list indicated the relation of interrupts and tasks
-                            lInterruptTime.append(time)
-                elif 'stop' in child.tag:
-                    lTasks = list(filter(lambda x: (x.name == name), lCurrentTasks))
-                    
-                    # If the task was interrupted  
-                    if len(lTasks) == 1:
-                        # Remove the last interrupt time as that task has stopped
-                        lTasks[0].stop = time
-                        config.add_timing_meas(lTasks[0])
-                        lCurrentTasks.remove(lTasks[0])
-                        
-                    # Mutliple tasks with the same name and iteration are present, this shouldnt happen
-                    elif len(lTasks) > 1:
-                        # Handle errors if any of the simulations fail
-                        message = (f"Multiple tasks with the same name have been found")
-                        print(message)
-                        raise Exception(message)
-                    
-                    # A non existant task has been stopped
-                    else:
-                        # Handle errors if any of the simulations fail
-                        message = (f"A non existant task has been stopped")
-                        print(message)
-                        raise Exception(message)
+        energy, avgLatency, throughput = reduce_traces(config, outputDir)
+        store.record(config, "ok", energy, avgLatency, throughput)
+        return energy, avgLatency, throughput
+
+def reduce_traces(config: PlatformConfig, outputDir: Path = None):
+    """ 
+    Streams the XML output files of a simulation into the measurements of the configuration.
+
+    Args:
+        config (PlatformConfig): The configuration whose traces should be reduced.
+        outputDir (Path): Directory holding the traces, the output directory of the configuration by default.
+
+    Returns:
+        tuple: (energy, average latency, throughput)
+    """
+    outputDir = config.outputDir if outputDir is None else outputDir
+    if os.path.isfile(outputDir.joinpath(TRACE_ARCHIVE)):
+        # The traces were converted, the arrays are loaded without parsing any XML
+        load_trace_archive(outputDir.joinpath(TRACE_ARCHIVE), config._measPower, config._measTiming)
+        return finish_reduction(config, outputDir)
     
-        return config.get_metrics()
+    # Stream power usage data from the simulation output
+    try:
+        parse_battery_trace(outputDir.joinpath("BatteryTrace.xml"), config._measPower)
+    except:
+        print(f"Measurmenet {config.configName} is fucked")
+        raise Exception(f"Measurmenet {config.configName} is fucked")
+    
+    # Stream execution trace data for each node in the system
+    for i in range(1, config.numOfNodes + 1):
+        parse_processor_trace(outputDir.joinpath(f"ProcessorTraceNode{i}.xml"), config._measTiming)
+
+    return finish_reduction(config, outputDir)
+
+def finish_reduction(config: PlatformConfig, outputDir: Path):
+    """
+    Reduces the measurements fed from the traces or a trace archive.
+
+    Returns:
+        tuple: (energy, average latency, throughput)
+    """
+    # Keep the reduced metrics so the traces are not parsed again
+    energy, avgLatency, throughput = config.reduce_measurements()
+    if SIM_STOP_MODE == "confidence":
+        # The monitors ran until they were accurate, their estimates replace the ones of the traces
+        dEstimates = read_application_estimates(config, outputDir)
+        if "latency" in dEstimates and "throughput" in dEstimates:
+            avgLatency, throughput = dEstimates["latency"].point, dEstimates["throughput"].point
+            config.set_metrics(energy, avgLatency, throughput)
+    return energy, avgLatency, throughput
+
+def read_application_estimates(config: PlatformConfig, outputDir: Path = None):
+    """
+    Reads the interval estimates of the throughput and latency monitors of a simulation into the configuration.
+
+    Args:
+        config (PlatformConfig): The simulated configuration.
+        outputDir (Path): Directory holding Application.log, the output directory of the configuration by default.
+
+    Returns:
+        dict: "throughput" and "latency" -> MonitorEstimate, empty when the monitors did not log any statistics.
+    """
+    outputDir = config.outputDir if outputDir is None else outputDir
+    file = outputDir.joinpath("Application.log")
+    if os.path.isfile(file):
+        config.dEstimates = {name: estimate for name, estimate in parse_application_log(file).items() if estimate.point is not None}
+    return config.dEstimates
@@ -0,0 +1,210 @@
+import re
+from dataclasses import dataclass, field
+from platform_config import PlatformConfig, get_geometric_mean
+from constants import MODEL_DIR, L_PROCESSORS
+
+# =====================
+# Model Parameters
+# =====================
+# Fixed parameters of the template, see the "Do not change" sections of dse_template.poosl
+
+THROUGHPUT_CONSTRAINT = 500.0  # Iterations per second released by Task1
+NOC_BANDWIDTH = 10000000.0  # Bytes per second of a connection between nodes
+NOC_SETUP_LATENCY = 0.00002  # Seconds to set up a connection between nodes
+NODE_BANDWIDTH = 200000000.0  # Bytes per second of a connection within a node
+NODE_SETUP_LATENCY = 0.00001  # Seconds to set up a connection within a node
+POWER_PER_CONNECTION = 0.01  # Watt per active connection
+POWER_PER_BYTE = 0.0000012  # Watt per stored byte
+NUM_OF_INITIAL_TOKENS = 3  # Tokens on F16, the number of iterations which can be in flight at once
+MAX_UTILIZATION = 0.95  # Utilization at which the queueing estimate is capped
+
+# Stationary distribution of the scenario Markov chain of Task1:
+# S1 -> S2 with probability 1/4, S2 -> S1 with probability 3/8
+D_SCENARIO_PROBABILITIES = {"S1": 0.6, "S2": 0.4}
+
+# Data buffers of the application as (producer, consumer, token size in bytes), see application.poosl
+L_BUFFERS = [
+    (1, 2, 2048), (1, 3, 4096), (1, 4, 2048),
+    (2, 5, 2048), (2, 6, 1024),
+    (3, 7, 2048), (3, 8, 1024),
+    (4, 8, 4096),
+    (5, 9, 2048), (6, 9, 2048),
+    (7, 9, 1024), (7, 10, 1024),
+    (8, 10, 1024),
+    (9, 11, 4096), (10, 11, 2048),
+]
+
+_TASK_NUMBERS = re.compile(r'\d+')
+
+# =====================
+# Processor Profiles
+# =====================
+
+@dataclass
+class ProcessorProfile:
+    """
+    Contents of a processor table in 0_POOSL_IDE/simulator.
+    """
+    frequency: float = 0.0  # Clock frequency in Hz
+    contextSwitchCycles: float = 0.0  # Cycles spent on a context switch
+    power: float = 0.0  # Power consumption in W while executing at full voltage
+    dCycles: dict = field(default_factory=dict)  # Task name -> {scenario: cycles}
+    dMemory: dict = field(default_factory=dict)  # Task name -> {scenario: bytes}
+
+def read_processor_profile(path):
+    """
+    Reads a processor table the same way ProcessorStatus.readProcessorProfile does.
+
+    Args:
+        path (Path): Path to the table.
+
+    Returns:
+        ProcessorProfile: The profile of the processor.
+    """
+    profile = ProcessorProfile()
+    for line in path.read_text().splitlines():
+        lWords = line.split()
+        if len(lWords) < 2:
+            continue
+        if lWords[0] == "Frequency":
+            profile.frequency = float(lWords[1])
+        elif lWords[0] == "ContextSwitchingtime":
+            profile.contextSwitchCycles = float(lWords[1])
+        elif lWords[0] == "PowerConsumption":
+            profile.power = float(lWords[1])
+        elif lWords[0].startswith("Task") and len(lWords) == 5:
+            profile.dCycles[lWords[0]] = {"S1": float(lWords[1]), "S2": float(lWords[2])}
+            profile.dMemory[lWords[0]] = {"S1": float(lWords[3]), "S2": float(lWords[4])}
+    return profile
+
+_dProfiles = None  # Processor type -> ProcessorProfile, read on first use
+
+def get_processor_profiles():
+    global _dProfiles
+    if _dProfiles is None:
+        _dProfiles = {proc: read_processor_profile(MODEL_DIR.joinpath("simulator", f"{proc}.txt")) for proc in L_PROCESSORS}
+    return _dProfiles
+
+# =====================
+# Analytic Estimate
+# =====================
+
+def get_task_groups(dMapping: dict):
+    """
+    Derives the tasks of an application from its mapping, merged tasks such as Task3_8 cover several numbers.
+
+    Returns:
+        dict: Task name -> tuple of the numbers of the original tasks it contains.
+    """
+    dGroups = {}
+    for label in dMapping:
+        name = label.removeprefix("Map").removesuffix("To")
+        dGroups[name] = tuple(int(number) for number in _TASK_NUMBERS.findall(name))
+    return dGroups
+
+def get_voltage_scale(volt):
+    # Voltage scales are stored as fractions, e.g. "2.0/3.0"
+    numerator, denominator = volt.split('/')
+    return float(numerator) / float(denominator)
+
+def estimate_metrics(config: PlatformConfig):
+    """
+    Estimates the metrics of a configuration from the processor tables without running Rotalumis.
+
+    Every task is charged its expected execution time over the scenarios plus one context switch,
+    scaled by the voltage scaling factor of its node. The load of the busiest node limits the
+    throughput, the latency is the critical path of the task graph where every task is stretched
+    by the load of its node. Energy covers processors, memories and connections until the simulation time of the configuration.
+
+    Args:
+        config (PlatformConfig): The configuration to estimate.
+
+    Returns:
+        tuple: (energy, average latency, throughput), the same as analyze_results
+    """
+    dProfiles = get_processor_profiles()
+    dGroups = get_task_groups(config.dMapping)
+    dTaskOf = {number: name for name, lNumbers in dGroups.items() for number in lNumbers}
+
+    dTime = {}  # Task name -> expected busy time per iteration
+    dNode = {}  # Task name -> node index
+    iterationEnergy = 0.0
+    for name in dGroups:
+        node = int(_TASK_NUMBERS.findall(config.dMapping[f"Map{name}To"])[0])
+        profile = dProfiles[config.dProcessors[f"Node{node}ProcessorType"]]
+        vsf = get_voltage_scale(config.dVoltageScales[f"VSF{node}"])
+
+        # Time and power scale with the voltage as in ProcessingUnit, power with its cube
+        time = 0.0
+        memoryEnergy = 0.0
+        for scenario, probability in D_SCENARIO_PROBABILITIES.items():
+            cycles = profile.dCycles[name][scenario]
+            if cycles > 0:
+                executionTime = (cycles + profile.contextSwitchCycles) / profile.frequency / vsf
+                time += probability * executionTime
+                memoryEnergy += probability * executionTime * profile.dMemory[name][scenario] * POWER_PER_BYTE
+        dTime[name] = time
+        dNode[name] = node
+        iterationEnergy += time * profile.power * vsf ** 3 + memoryEnergy
+
+    # Connections between the tasks, buffers within a merged task disappear
+    dComm = {}  # (producer, consumer) -> transfer time
+    for producer, consumer, tokenSize in L_BUFFERS:
+        source, target = dTaskOf.get(producer), dTaskOf.get(consumer)
+        if source is None or target is None or source == target:
+            continue
+        if dNode[source] == dNode[target]:
+            transferTime = NODE_SETUP_LATENCY + tokenSize / NODE_BANDWIDTH
+        else:
+            transferTime = NOC_SETUP_LATENCY + tokenSize / NOC_BANDWIDTH
+        dComm[(source, target)] = max(dComm.get((source, target), 0.0), transferTime)
+        iterationEnergy += transferTime * POWER_PER_CONNECTION
+
+    # The busiest node limits the number of iterations per second
+    dBusy = {}
+    for name, time in dTime.items():
+        dBusy[dNode[name]] = dBusy.get(dNode[name], 0.0) + time
+    throughput = min(THROUGHPUT_CONSTRAINT, 1 / max(dBusy.values()))
+
+    # Critical path, tasks are stretched by the waiting time caused by the other load on their node
+    dInputs = {name: [] for name in dGroups}
+    for (source, target), transferTime in dComm.items():
+        dInputs[target].append((source, transferTime))
+    dFinish = {}
+    lOpen = list(dGroups)
+    while lOpen:
+        # Merged tasks break the numbering order, so take the tasks whose producers are all done
+        for name in lOpen:
+            lInputs = dInputs[name]
+            if all(source in dFinish for source, transferTime in lInputs):
+                break
+        utilization = min(MAX_UTILIZATION, throughput * (dBusy[dNode[name]] - dTime[name]))
+        start = max([dFinish[source] + transferTime for source, transferTime in lInputs], default=0.0)
+        dFinish[name] = start + dTime[name] / (1 - utilization)
+        lOpen.remove(name)
+    avgLatency = max(dFinish.values())
+
+    # Pipelining is limited by the initial tokens on the feedback buffer
+    throughput = min(throughput, NUM_OF_INITIAL_TOKENS / avgLatency)
+
+    energy = iterationEnergy * throughput * float(config.simTime)
+    return energy, avgLatency, throughput
+
+def rank_configs(lConfigs: list, numOfConfigs: int = None):
+    """
+    Orders configurations by the geometric mean of their estimated metrics, the same score the searches use.
+    Searches can simulate only the most promising part of a large set of candidates.
+
+    Args:
+        lConfigs (list): PlatformConfig objects to rank.
+        numOfConfigs (int): Number of configurations to keep, all of them by default.
+
+    Returns:
+        list: The configurations, best estimate first.
+    """
+    lScores = []
+    for config in lConfigs:
+        energy, avgLatency, throughput = estimate_metrics(config)
+        lScores.append((get_geometric_mean(1/config.numOfNodes, 1/energy, 1/avgLatency, throughput), config))
+    lScores.sort(key=lambda x: x[0], reverse=True)
+    return [config for score, config in lScores[:numOfConfigs]]
@@ -22,7 +22,7 @@ class IterationTiming:
     Stores task timing for a specific iteration of execution.
     """
     _dTasks: dict  # Dictionary to store task timing per iteration
-    _latency: float = float('inf')  # Iteration latency
+    _latency: float = None  # Iteration latency, None while it has to be recomputed
     
     def add_measurment(self, task: TaskTiming):
         """
@@ -34,30 +34,31 @@ class IterationTiming:
             # raise Exception(message)
         
         self._dTasks[task.name] = task
+        self._latency = None
         
     def get_latency(self):
         """
-        Calculates the latency for the iteration.
+        Calculates the latency for the iteration, the result is cached until a new measurement is added.
         Returns:
             float: Computed latency.
         """
-        self._latency = self._dTasks[L_TASKS[-1]].stop - self._dTasks[L_TASKS[0]].start
-        if self._latency <= 0:
-            # message = (f"Iteration timing has an incorrect latency {self._latency}")
-            # print(message)
-            # raise Exception(message)
-            return 0.0
-        else:
-            return self._latency
+        if self._latency is None:
+            self._latency = self._dTasks[L_TASKS[-1]].stop - self._dTasks[L_TASKS[0]].start
+            if self._latency <= 0:
+                # message = (f"Iteration timing has an incorrect latency {self._latency}")
+                # print(message)
+                # raise Exception(message)
+                self._latency = 0.0
+        return self._latency
     
 @dataclass
 class TimingMeasurements:
     """
     Stores and processes timing metrics over multiple iterations.
     """
-    _avgLatency: float = 0.0  # Average latency across iterations
+    _avgLatency: float = None  # Average latency across iterations, None while it has to be recomputed
     _dIterations: dict = field(default_factory=dict)  # Dictionary of iteration timings
-    _throughput: float = 0.0  # System throughput
+    _throughput: float = None  # System throughput, None while it has to be recomputed
     startTime: float = float('inf')  # Start time of first iteration
     stopTime: float = 0.0  # Stop time of last iteration
     
@@ -78,30 +79,42 @@ class TimingMeasurements:
         # Update the overall simulation start and stop times
         self.startTime = min(float(task.start), self.startTime)
         self.stopTime = max(float(task.stop), self.stopTime)
+        
+        # The derived metrics have to be recomputed
+        self._avgLatency = None
+        self._throughput = None
 
     def get_avg_latency(self):
         """
-        Computes the average latency across all valid iterations.
+        Computes the average latency across all valid iterations, the result is cached until a new measurement is added.
         
         Returns:
             float: The computed average latency.
         """
-        # Count the number of incomplete iterations (latency = 0)
-        numOfIncompleteIt = len(list(filter(lambda x: x == 0.0, [it.get_latency() for it in self._dIterations.values()])))
-        numOfValidIt = len(self._dIterations) - numOfIncompleteIt
+        if self._avgLatency is None:
+            # Incomplete iterations have a latency of 0 and do not count as valid iterations
+            sumOfLatencies = 0.0
+            numOfValidIt = 0
+            for iteration in self._dIterations.values():
+                latency = iteration.get_latency()
+                if latency != 0.0:
+                    sumOfLatencies += latency
+                    numOfValidIt += 1
 
-        # Compute average latency for valid iterations
-        self._avgLatency = 0.0 if numOfValidIt == 0 else sum([iteration.get_latency() for iteration in self._dIterations.values()]) / numOfValidIt
+            # Compute average latency for valid iterations
+            self._avgLatency = 0.0 if numOfValidIt == 0 else sumOfLatencies / numOfValidIt
         return self._avgLatency
                 
     def get_throughput(self):
         """
-        Computes the system throughput as the number of completed iterations per unit time.
+        Computes the system throughput as the number of completed iterations per unit time,
+        the result is cached until a new measurement is added.
         
         Returns:
             float: The computed throughput.
         """
-        # Ensure the simulation period is valid before computing throughput
-        self._throughput = len(self._dIterations) / (self.stopTime - self.startTime) if (self.stopTime - self.startTime) > 0 else 0.0
+        if self._throughput is None:
+            # Ensure the simulation period is valid before computing throughput
+            self._throughput = len(self._dIterations) / (self.stopTime - self.startTime) if (self.stopTime - self.startTime) > 0 else 0.0
         return self._throughput
         
\ No newline at end of file
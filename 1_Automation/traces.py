@@ -0,0 +1,305 @@
+import os
+import re
+import argparse
+import numpy as np
+import xml.etree.ElementTree as et
+from pathlib import Path
+from dataclasses import dataclass
+from power import PowerMeasurements
+from timing import TaskTiming, TimingMeasurements
+
+# =====================
+# Streaming Trace Parsers
+# =====================
+
+def iter_trace_elements(path):
+    """
+    Iterates over the event elements of a Rotalumis XML trace without building the whole tree.
+
+    Every element is cleared from the root once it has been handed out, so memory use
+    stays constant regardless of the length of the trace.
+
+    Args:
+        path (Path): Path to the XML trace file.
+
+    Yields:
+        tuple: (tag, attributes) of every event element in the trace.
+    """
+    root = None
+    for event, element in et.iterparse(path, events=("start", "end")):
+        if root is None:
+            root = element
+        elif event == "end" and element is not root:
+            yield element.tag, element.attrib
+            # Drop the element and any already handled siblings from the root
+            root.clear()
+
+def parse_battery_trace(path, measPower: PowerMeasurements, chunkSize: int = 65536):
+    """
+    Streams a BatteryTrace.xml file into a PowerMeasurements object.
+
+    The samples are handed over in chunks so they are copied into the NumPy buffers in bulk.
+
+    Args:
+        path (Path): Path to the battery trace.
+        measPower (PowerMeasurements): Power measurements to feed.
+        chunkSize (int): Number of samples collected before they are handed over.
+    """
+    lDifference = []
+    lTime = []
+    for tag, attrib in iter_trace_elements(path):
+        lDifference.append(float(attrib["difference"]))
+        lTime.append(float(attrib["time"]))
+        if len(lTime) >= chunkSize:
+            measPower.update_ltPower_bulk(lDifference, lTime)
+            lDifference = []
+            lTime = []
+    measPower.update_ltPower_bulk(lDifference, lTime)
+
+def iter_processor_events(path):
+    """
+    Iterates over the start and stop events of a ProcessorTraceNode*.xml file.
+
+    Yields:
+        tuple: (is start, task name, iteration, time), the iteration of a stop event is -1 as the trace does not carry it.
+    """
+    for tag, attrib in iter_trace_elements(path):
+        if 'start' in tag:
+            yield True, attrib['task'], int(attrib['iteration']), float(attrib['time'])
+        elif 'stop' in tag:
+            yield False, attrib['task'], -1, float(attrib['time'])
+
+def parse_processor_trace(path, measTiming: TimingMeasurements):
+    """
+    Streams a ProcessorTraceNode*.xml file into a TimingMeasurements object.
+
+    Args:
+        path (Path): Path to the processor trace of a single node.
+        measTiming (TimingMeasurements): Timing measurements to feed.
+    """
+    feed_processor_events(iter_processor_events(path), measTiming)
+
+def feed_processor_events(events, measTiming: TimingMeasurements):
+    """
+    Turns the start and stop events of a single node into task timings.
+
+    Tasks which are currently live on the node are kept in a dict keyed by (task, iteration),
+    stop events only carry the task name so a second index on the name is kept as well.
+
+    Args:
+        events (iterable): (is start, task name, iteration, time) in trace order, see iter_processor_events.
+        measTiming (TimingMeasurements): Timing measurements to feed.
+    """
+    dCurrentTasks = {}  # (name, iteration) -> TaskTiming of every live task
+    dCurrentNames = {}  # name -> list of live TaskTiming objects with that name
+    lInterruptTime = []
+
+    for isStart, name, iteration, time in events:
+        if isStart:
+            task = dCurrentTasks.get((name, iteration))
+
+            # If the task was interrupted
+            if task is not None:
+                # Remove the last interrupt time as that task has resumed
+                task.down += time - lInterruptTime.pop(-1)
+
+            # A new task has started
+            else:
+                task = TaskTiming(name=name, start=time, iteration=iteration)
+                dCurrentTasks[(name, iteration)] = task
+                dCurrentNames.setdefault(name, []).append(task)
+
+                # The new task has interrupted another task
+                if len(dCurrentTasks) > 1:
+                    # Add the start time to the end of the interrupt time, this list indicated the relation of interrupts and tasks
+                    lInterruptTime.append(time)
+
+        else:
+            lTasks = dCurrentNames.get(name, [])
+
+            if len(lTasks) == 1:
+                task = lTasks.pop()
+                task.stop = time
+                measTiming.add_measurement(task)
+                del dCurrentTasks[(task.name, task.iteration)]
+                del dCurrentNames[name]
+
+            # Mutliple tasks with the same name are present, this shouldnt happen
+            elif len(lTasks) > 1:
+                message = (f"Multiple tasks with the same name have been found")
+                print(message)
+                raise Exception(message)
+
+            # A non existant task has been stopped
+            else:
+                message = (f"A non existant task has been stopped")
+                print(message)
+                raise Exception(message)
+
+# =====================
+# Monitor Log Parsers
+# =====================
+
+@dataclass
+class MonitorEstimate:
+    """
+    Interval estimate of a performance monitor of the POOSL performance library.
+    """
+    point: float  # Point estimate, None when the interval is not specified
+    lower: float  # Lower bound of the confidence interval
+    upper: float  # Upper bound of the confidence interval
+    confidenceLevel: float  # Confidence level of the interval
+    relativeError: float  # Relative error of the point estimate
+    accurate: bool  # True when the relative error met the accuracy of the monitor
+
+_MONITOR_STATISTICS = re.compile(
+    r"^(?P<point>[^\t]+)\t+\[(?P<lower>[^,]+), (?P<upper>[^\]]+)\]\t+(?P<level>\S+)\t+(?P<error>\S+)\t+(?P<accurate>true|false)")
+
+def parse_monitor_statistics(line: str):
+    """
+    Parses the line a monitor writes below its heading with logStatistics.
+
+    Returns:
+        MonitorEstimate: The estimate, None when the line is not a statistics line.
+    """
+    match = _MONITOR_STATISTICS.match(line.strip("\r\n"))
+    if match is None:
+        return None
+    point = match["point"].strip()
+    return MonitorEstimate(
+        point=None if point == "Not Specified" else float(point),
+        lower=float(match["lower"]),
+        upper=float(match["upper"]),
+        confidenceLevel=float(match["level"]),
+        relativeError=float(match["error"]),
+        accurate=match["accurate"] == "true",
+    )
+
+def parse_application_log(path):
+    """
+    Reads the throughput and latency estimates from the Application.log file of ApplicationStatus.
+
+    Args:
+        path (Path): Path to the application log.
+
+    Returns:
+        dict: "throughput" and "latency" -> MonitorEstimate, a monitor without statistics is left out.
+    """
+    dEstimates = {}
+    lLines = path.read_text().splitlines()
+    for i, line in enumerate(lLines):
+        for name in ["throughput", "latency"]:
+            # The statistics follow the heading on the line after the heading
+            if line.startswith(f"{name.capitalize()} Results:") and i + 2 < len(lLines):
+                estimate = parse_monitor_statistics(lLines[i + 2])
+                if estimate is not None:
+                    dEstimates[name] = estimate
+    return dEstimates
+
+# =====================
+# Trace Archives
+# =====================
+
+TRACE_ARCHIVE = "traces.npz"  # Compressed columnar copy of the XML traces of an output directory
+
+def write_trace_archive(outputDir: Path, numOfNodes: int = None):
+    """
+    Converts the XML traces of an output directory into a compressed archive of typed arrays.
+
+    Power changes are stored as time and difference, processor events as node, event type
+    (1 start, 0 stop), task id, iteration and time. Task ids index the array of task names.
+
+    Args:
+        outputDir (Path): Directory holding BatteryTrace.xml and ProcessorTraceNode*.xml.
+        numOfNodes (int): Number of processor traces, counted in the directory by default.
+
+    Returns:
+        Path: Path to the archive.
+    """
+    if numOfNodes is None:
+        numOfNodes = len(list(outputDir.glob("ProcessorTraceNode*.xml")))
+
+    lPowerTime, lPowerDifference = [], []
+    for tag, attrib in iter_trace_elements(outputDir.joinpath("BatteryTrace.xml")):
+        lPowerDifference.append(float(attrib["difference"]))
+        lPowerTime.append(float(attrib["time"]))
+
+    dTaskIds = {}  # Task name -> task id
+    lNode, lStart, lTask, lIteration, lTime = [], [], [], [], []
+    for node in range(1, numOfNodes + 1):
+        for isStart, name, iteration, time in iter_processor_events(outputDir.joinpath(f"ProcessorTraceNode{node}.xml")):
+            lNode.append(node)
+            lStart.append(isStart)
+            lTask.append(dTaskIds.setdefault(name, len(dTaskIds)))
+            lIteration.append(iteration)
+            lTime.append(time)
+
+    file = outputDir.joinpath(TRACE_ARCHIVE)
+    np.savez_compressed(
+        file,
+        powerTime=np.array(lPowerTime, dtype=np.float64),
+        powerDifference=np.array(lPowerDifference, dtype=np.float64),
+        taskNames=np.array(list(dTaskIds), dtype=str),
+        node=np.array(lNode, dtype=np.uint8),
+        start=np.array(lStart, dtype=np.bool_),
+        task=np.array(lTask, dtype=np.uint16),
+        iteration=np.array(lIteration, dtype=np.int32),
+        time=np.array(lTime, dtype=np.float64),
+    )
+    return file
+
+def load_trace_archive(path, measPower: PowerMeasurements, measTiming: TimingMeasurements):
+    """
+    Feeds the measurements from a trace archive instead of the XML traces.
+
+    Args:
+        path (Path): Path to the archive written by write_trace_archive.
+        measPower (PowerMeasurements): Power measurements to feed.
+        measTiming (TimingMeasurements): Timing measurements to feed.
+    """
+    with np.load(path) as archive:
+        measPower.update_ltPower_bulk(archive["powerDifference"], archive["powerTime"])
+
+        lTaskNames = archive["taskNames"].tolist()
+        aNode = archive["node"]
+        for node in np.unique(aNode):
+            # Every node is replayed on its own, interrupts only relate tasks of the same node
+            aMask = aNode == node
+            feed_processor_events(zip(
+                archive["start"][aMask].tolist(),
+                [lTaskNames[task] for task in archive["task"][aMask].tolist()],
+                archive["iteration"][aMask].tolist(),
+                archive["time"][aMask].tolist(),
+            ), measTiming)
+
+def convert_output_dirs(root: Path, removeTraces: bool = False):
+    """
+    Writes a trace archive into every output directory below root with XML traces and no archive yet.
+
+    Args:
+        root (Path): Directory to search, e.g. OUTPUT_DIR_BASE.
+        removeTraces (bool): Remove the XML traces once they are archived.
+
+    Returns:
+        int: Number of archives written.
+    """
+    numOfArchives = 0
+    for dirPath, lDirs, lFiles in os.walk(root):
+        outputDir = Path(dirPath)
+        if "BatteryTrace.xml" not in lFiles:
+            continue
+        if TRACE_ARCHIVE not in lFiles:
+            write_trace_archive(outputDir)
+            numOfArchives += 1
+        if removeTraces:
+            for file in ["BatteryTrace.xml"] + [file for file in lFiles if file.startswith("ProcessorTraceNode")]:
+                os.remove(outputDir.joinpath(file))
+    return numOfArchives
+
+if __name__ == "__main__":
+    from constants import OUTPUT_DIR_BASE
+    parser = argparse.ArgumentParser(description="Converts the XML traces of earlier simulations into trace archives")
+    parser.add_argument("root", type=Path, nargs="?", default=OUTPUT_DIR_BASE, help="directory to convert, the output directory by default")
+    parser.add_argument("--remove-traces", action="store_true", help="remove the XML traces once they are archived")
+    args = parser.parse_args()
+    print(f"Wrote {convert_output_dirs(args.root, args.remove_traces)} trace archives")
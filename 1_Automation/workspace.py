@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from constants import MODEL_DIR, SCRATCH_DIR, OUTPUT_RETENTION
+
+L_PROCESSOR_TABLES = ["ARMv8.txt", "MIPS.txt", "Adreno.txt"]  # Read-only tables Rotalumis expects next to the model
+L_LOG_SUFFIXES = [".txt", ".log", ".poosl"]  # Error output, monitor logs and the model, kept by the "logs" retention
+
+# =====================
+# Simulation Workspace
+# =====================
+
+def link_file(source: Path, destination: Path):
+    """
+    Hard links a file, symlinks it when the destination is on another file system and copies it as a last resort.
+    """
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(source), destination)
+        except OSError:
+            shutil.copy(source, destination)
+
+class Workspace:
+    """
+    Working directory of a single simulation.
+
+    With a SCRATCH_DIR the simulation runs in a fresh directory below it, e.g. on a tmpfs, and only the
+    artefacts kept by the retention policy are moved to the output directory afterwards. Without one the
+    simulation runs in its output directory and the retention policy removes the rest in place.
+
+    Attributes:
+        outputDir (Path): Durable output directory of the configuration.
+        workDir (Path): Directory the simulation runs in.
+        retention (str): "all" keeps every file, "logs" drops the XML traces, "none" drops the whole directory.
+            The policy only applies to analyzed simulations, otherwise the traces are still needed.
+    """
+    def __init__(self, outputDir: Path, scratchDir: Path = SCRATCH_DIR, retention: str = OUTPUT_RETENTION):
+        if retention not in ["all", "logs", "none"]:
+            message = f"Unknown output retention {retention}, expected all, logs or none"
+            print(message)
+            raise Exception(message)
+        self.outputDir = Path(outputDir)
+        self.retention = retention
+        self.scratchDir = scratchDir
+        if scratchDir is None:
+            self.workDir = self.outputDir
+        else:
+            os.makedirs(scratchDir, exist_ok=True)
+            self.workDir = Path(tempfile.mkdtemp(prefix=f"{self.outputDir.name[:32]}-", dir=scratchDir))
+
+    def create(self):
+        """
+        Creates the working directory and links the processor tables into it.
+        """
+        os.makedirs(self.workDir, exist_ok=True)
+        for table in L_PROCESSOR_TABLES:
+            if not os.path.isfile(self.workDir.joinpath(table)):
+                link_file(MODEL_DIR.joinpath("simulator", table), self.workDir.joinpath(table))
+        return self
+
+    def is_kept(self, file: Path, analyzed: bool):
+        if file.name in L_PROCESSOR_TABLES:
+            # The tables are links to the model directory, they are linked again when the simulation reruns
+            return self.scratchDir is None
+        if not analyzed or self.retention == "all":
+            return True
+        return self.retention == "logs" and file.suffix in L_LOG_SUFFIXES
+
+    def close(self, analyzed: bool):
+        """
+        Applies the retention policy and moves the kept artefacts to the output directory.
+
+        Args:
+            analyzed (bool): The metrics were reduced from the traces, the traces are only kept when retained.
+        """
+        if not os.path.isdir(self.workDir):
+            return
+        if analyzed and self.retention == "none":
+            shutil.rmtree(self.workDir, ignore_errors=True)
+            if self.workDir != self.outputDir:
+                shutil.rmtree(self.outputDir, ignore_errors=True)
+            return
+
+        if self.workDir != self.outputDir:
+            os.makedirs(self.outputDir, exist_ok=True)
+        for file in list(self.workDir.iterdir()):
+            if not self.is_kept(file, analyzed):
+                os.remove(file)
+            elif self.workDir != self.outputDir:
+                shutil.move(file, self.outputDir.joinpath(file.name))
+        if self.workDir != self.outputDir:
+            shutil.rmtree(self.workDir, ignore_errors=True)